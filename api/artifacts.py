@@ -0,0 +1,72 @@
+import os
+import time
+from typing import List
+
+from api.config import ARTIFACT_ROOT
+
+# single-version layout (ARTIFACT_ROOT unset)
+MODEL_PATH = "models/churn_model.joblib"
+INDEX_DIR = "rag/index"
+
+MODEL_FILE = "churn_model.joblib"
+INDEX_FILE = "docs.index"
+
+
+def _mtime_version(*paths: str) -> str:
+    mtime = max(os.stat(p).st_mtime for p in paths)
+    return time.strftime("%Y%m%d-%H%M%S", time.localtime(mtime))
+
+
+def _versions(kind: str, required_file: str) -> List[str]:
+    # publish a version by writing it to a temp name and renaming the directory into place
+    root = os.path.join(ARTIFACT_ROOT, kind)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        v for v in os.listdir(root)
+        if not v.startswith(".") and not v.endswith(".tmp")
+        and os.path.exists(os.path.join(root, v, required_file))
+    )
+
+
+def model_versions() -> List[str]:
+    if ARTIFACT_ROOT is None:
+        return [_mtime_version(MODEL_PATH)] if os.path.exists(MODEL_PATH) else []
+    return _versions("models", MODEL_FILE)
+
+
+def index_versions() -> List[str]:
+    if ARTIFACT_ROOT is None:
+        path = os.path.join(INDEX_DIR, INDEX_FILE)
+        return [_mtime_version(path, os.path.join(INDEX_DIR, "meta_ids.npy"))] if os.path.exists(path) else []
+    return _versions("indexes", INDEX_FILE)
+
+
+def latest_model_version() -> str:
+    versions = model_versions()
+    if not versions:
+        raise FileNotFoundError("No churn model artifact found")
+    return versions[-1]
+
+
+def latest_index_version() -> str:
+    versions = index_versions()
+    if not versions:
+        raise FileNotFoundError("No FAISS index artifact found")
+    return versions[-1]
+
+
+def model_path(version: str) -> str:
+    if version not in model_versions():
+        raise FileNotFoundError(f"Model version '{version}' not found")
+    if ARTIFACT_ROOT is None:
+        return MODEL_PATH
+    return os.path.join(ARTIFACT_ROOT, "models", version, MODEL_FILE)
+
+
+def index_dir(version: str) -> str:
+    if version not in index_versions():
+        raise FileNotFoundError(f"Index version '{version}' not found")
+    if ARTIFACT_ROOT is None:
+        return INDEX_DIR
+    return os.path.join(ARTIFACT_ROOT, "indexes", version)
@@ -0,0 +1,107 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from api.executors import PoolSaturated
+
+
+class MicroBatcher:
+    """
+    Collects items submitted concurrently from many requests and processes
+    them with one batch_fn(items) -> results call.
+
+    A batch is closed when it holds max_batch items or max_wait_ms after its
+    first item arrived, whichever comes first. Each submit() returns a Future
+    resolved with that item's result.
+    """
+
+    def __init__(self, batch_fn, max_batch: int = 32, max_wait_ms: float = 3.0,
+                 max_queue: int = 256, name: str = "batcher"):
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self._batch_fn = batch_fn
+        self._start()
+        # threads do not survive fork (gunicorn --preload imports the app in the master)
+        os.register_at_fork(after_in_child=self._start)
+
+    def _start(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_queue)
+
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self.size_counts: dict[int, int] = {}
+
+        self._thread = threading.Thread(target=self._loop, name=self.name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            raise PoolSaturated(self.name)
+        return future
+
+    def _collect(self) -> list:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            # drop items whose caller went away (cancelled futures)
+            batch = [(item, fut) for item, fut in self._collect() if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            self._record(len(batch))
+
+            try:
+                results = self._batch_fn([item for item, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                else:
+                    # one bad item must not fail the others: retry them one by one
+                    self._run_each(batch)
+                continue
+            for (_, fut), result in zip(batch, results):
+                fut.set_result(result)
+
+    def _run_each(self, batch: list):
+        for item, fut in batch:
+            try:
+                fut.set_result(self._batch_fn([item])[0])
+            except Exception as e:
+                fut.set_exception(e)
+
+    def _record(self, size: int):
+        with self._lock:
+            self.batches += 1
+            self.items += size
+            self.largest_batch = max(self.largest_batch, size)
+            self.size_counts[size] = self.size_counts.get(size, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+                "largest_batch": self.largest_batch,
+                "batch_size_counts": dict(sorted(self.size_counts.items())),
+                "queued": self._queue.qsize(),
+            }
@@ -1,3 +1,61 @@
 import os
 
 API_KEY = os.getenv("API_KEY", "dev-secret-key-change-me")
+
+# batch scoring: rows per predict_proba call (keeps 100k-row requests bounded in memory)
+PREDICT_BLOCK_SIZE = int(os.getenv("PREDICT_BLOCK_SIZE", "5000"))
+
+# single-row /predict without pandas/ColumnTransformer (see ml/compiled_model.py)
+COMPILED_PREDICT = os.getenv("COMPILED_PREDICT", "1") == "1"
+
+# LRU cache of query embeddings for /ask (0 disables)
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "1024"))
+
+# executors for CPU-bound work: <NAME>_WORKERS threads, up to <NAME>_QUEUE waiting jobs, then 503
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "2"))
+EMBED_QUEUE = int(os.getenv("EMBED_QUEUE", "32"))
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", "2"))
+SEARCH_QUEUE = int(os.getenv("SEARCH_QUEUE", "64"))
+PREDICT_WORKERS = int(os.getenv("PREDICT_WORKERS", "4"))
+PREDICT_QUEUE = int(os.getenv("PREDICT_QUEUE", "128"))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "1"))
+BATCH_QUEUE = int(os.getenv("BATCH_QUEUE", "4"))
+
+# /ask micro-batching: concurrent questions share one encode + one FAISS search
+ASK_BATCHING = os.getenv("ASK_BATCHING", "1") == "1"
+ASK_BATCH_MAX_SIZE = int(os.getenv("ASK_BATCH_MAX_SIZE", "32"))
+ASK_BATCH_WAIT_MS = float(os.getenv("ASK_BATCH_WAIT_MS", "3"))
+ASK_BATCH_QUEUE = int(os.getenv("ASK_BATCH_QUEUE", "256"))
+# upper bound for top_k in /ask and /ask/batch
+ASK_MAX_TOP_K = int(os.getenv("ASK_MAX_TOP_K", "100"))
+
+# eager = load model/index/embedder in parallel at startup (in the background, see /health/ready)
+# lazy  = load each resource on first use
+STARTUP_LOAD = os.getenv("STARTUP_LOAD", "eager")
+WARMUP = os.getenv("WARMUP", "1") == "1"
+
+# versioned artifacts: <ARTIFACT_ROOT>/models/<version>/churn_model.joblib and
+# <ARTIFACT_ROOT>/indexes/<version>/docs.index (+ meta_*, index_config.json).
+# Unset = the single models/ + rag/index/ layout, versioned by file mtime.
+ARTIFACT_ROOT = os.getenv("ARTIFACT_ROOT") or None
+# seconds between checks for newer artifact versions (0 = only via POST /admin/reload)
+ARTIFACT_WATCH_INTERVAL = float(os.getenv("ARTIFACT_WATCH_INTERVAL", "0"))
+
+# memory-map docs.index (and the metadata store, always mapped) so worker processes
+# share one copy of the vectors through the page cache
+INDEX_MMAP = os.getenv("INDEX_MMAP", "0") == "1"
+# load every resource at import time; with `gunicorn --preload` this happens once in the
+# master and the forked workers share the loaded pages copy-on-write
+PRELOAD_RESOURCES = os.getenv("PRELOAD_RESOURCES", "0") == "1"
+
+# logging: records are written by a background thread; at most LOG_QUEUE_SIZE wait,
+# further records are dropped rather than blocking requests
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# fraction of per-query RAG logs (/ask, /recommend) that are written
+RAG_LOG_SAMPLE_RATE = float(os.getenv("RAG_LOG_SAMPLE_RATE", "1.0"))
+
+# hybrid retrieval: fuse FAISS and BM25 (rag/lexical.py) rankings with reciprocal rank fusion;
+# each side contributes HYBRID_CANDIDATES chunks (at least top_k). Needs the lex_* files in the index dir.
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") == "1"
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
@@ -0,0 +1,82 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from api.config import (
+    EMBED_WORKERS, EMBED_QUEUE,
+    SEARCH_WORKERS, SEARCH_QUEUE,
+    PREDICT_WORKERS, PREDICT_QUEUE,
+    BATCH_WORKERS, BATCH_QUEUE,
+)
+from api.metrics import registry as metrics
+
+
+class PoolSaturated(Exception):
+    """
+    Raised when a pool already has workers + queue_size jobs in flight.
+    """
+
+    def __init__(self, pool: str):
+        super().__init__(f"{pool} pool is saturated")
+        self.pool = pool
+
+
+class BoundedExecutor:
+    """
+    Thread pool for CPU-bound work with a bounded backlog: once
+    workers + queue_size jobs are running or waiting, new work is rejected
+    immediately instead of queueing up and inflating tail latency.
+    """
+
+    def __init__(self, name: str, workers: int, queue_size: int):
+        self.name = name
+        self.capacity = workers + queue_size
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker")
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    async def run(self, fn, *args, **kwargs):
+        if not self._slots.acquire(blocking=False):
+            raise PoolSaturated(self.name)
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._pool.submit(functools.partial(fn, *args, **kwargs))
+        except BaseException:
+            self._release(None)
+            raise
+        # the slot is freed when the job finishes, even if the request was cancelled
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# separately sized so a burst on one endpoint cannot starve the others
+embed_pool = BoundedExecutor("embed", EMBED_WORKERS, EMBED_QUEUE)
+search_pool = BoundedExecutor("search", SEARCH_WORKERS, SEARCH_QUEUE)
+predict_pool = BoundedExecutor("predict", PREDICT_WORKERS, PREDICT_QUEUE)
+batch_pool = BoundedExecutor("batch", BATCH_WORKERS, BATCH_QUEUE)
+
+POOLS = (embed_pool, search_pool, predict_pool, batch_pool)
+
+metrics.gauge(
+    "pool_in_flight", "Jobs running or queued per executor", ("pool",),
+    fn=lambda: {(pool.name,): pool.in_flight for pool in POOLS},
+)
+metrics.gauge(
+    "pool_capacity", "Max jobs running or queued per executor", ("pool",),
+    fn=lambda: {(pool.name,): pool.capacity for pool in POOLS},
+)
@@ -1,8 +1,68 @@
+import atexit
+import datetime
+import json
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from api.config import LOG_QUEUE_SIZE
 
 LOG_FILE = "logs/api.log"
 
+# attributes every LogRecord has; anything else was passed via extra= and becomes a JSON field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: ts, level, event (the log message) + the extra= fields.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "event": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the background writer without formatting them on the
+    request thread; drops (and counts) records if the writer falls behind.
+    """
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # same-process queue: the record (and its extra fields) can be passed as is
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            _NonBlockingQueueHandler.dropped += 1
+
+
+_listener: QueueListener | None = None
+
+
+def _start_listener(handler: QueueHandler, file_handler: logging.Handler):
+    global _listener
+    handler.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    _listener = QueueListener(handler.queue, file_handler, respect_handler_level=True)
+    _listener.start()
+
+
 def get_logger():
     logger = logging.getLogger("domain_intelligence_api")
 
@@ -10,17 +70,30 @@ def get_logger():
         return logger
 
     logger.setLevel(logging.INFO)
-    
-    handler = RotatingFileHandler(
+    logger.propagate = False
+
+    # file I/O and rotation checks happen on the listener thread only
+    file_handler = RotatingFileHandler(
             LOG_FILE,
             maxBytes = 2_000_000,
             backupCount = 3
             )
+    file_handler.setFormatter(JsonFormatter())
 
-    formatter = logging.Formatter(
-            "%(asctime)s | %(levelname)s | %(message)s"
-            )
-    handler.setFormatter(formatter)
-
+    handler = _NonBlockingQueueHandler(None)
+    _start_listener(handler, file_handler)
     logger.addHandler(handler)
+
+    # flush what is queued on exit; the writer thread does not survive fork (gunicorn --preload)
+    atexit.register(lambda: _listener.stop())
+    os.register_at_fork(after_in_child=lambda: _start_listener(handler, file_handler))
     return logger
+
+
+def dropped_records() -> int:
+    return _NonBlockingQueueHandler.dropped
+
+
+def sampled(rate: float) -> bool:
+    # True for roughly `rate` of calls (1 = always, 0 = never)
+    return rate >= 1.0 or random.random() < rate
@@ -1,18 +1,47 @@
+import asyncio
+import gc
+import threading
 from fastapi import FastAPI, Request, Depends
+from fastapi.responses import JSONResponse, Response
 from api.schemas import (
     PredictResponse,
+    PredictBatchRequest,
+    PredictBatchResponse,
     AskRequest,
     AskResponse,
+    AskBatchRequest,
+    AskBatchResponse,
     RecommendResponse,
+    ReloadRequest,
+    ReloadResponse,
     ErrorResponse
 )
-from api.services import predict_service, ask_service, recommend_service
+from api.services import (
+    predict_service,
+    predict_many,
+    embed_query,
+    search_query,
+    submit_ask,
+    ask_many,
+    make_filter,
+    recommend_service,
+    embedding_cache_stats,
+    ask_batch_stats,
+    load_resources,
+    resource_status,
+    reload_artifacts,
+    watch_artifacts,
+)
+from api.config import STARTUP_LOAD, WARMUP, ARTIFACT_WATCH_INTERVAL, PRELOAD_RESOURCES
+from api.executors import POOLS, PoolSaturated, embed_pool, search_pool, predict_pool, batch_pool
+from api.metrics import registry as metrics, CONTENT_TYPE, HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT, POOL_REJECTIONS
 import time
-from api.logger import get_logger
+from api.logger import get_logger, dropped_records
 from api.auth import verify_api_key
 from fastapi.security.api_key import APIKeyHeader
 
 logger = get_logger()
+metrics.counter("log_records_dropped_total", "Log records dropped because the log queue was full", fn=dropped_records)
 
 app = FastAPI(
     title="Domain Intelligence System",
@@ -26,15 +55,67 @@ app = FastAPI(
     ]
 )
 api_key_scheme = APIKeyHeader(name="X-API-Key")
+_stop_watcher = threading.Event()
+
+if PRELOAD_RESOURCES:
+    # pre-fork load (gunicorn --preload): workers inherit the loaded model, embedder and
+    # index pages copy-on-write; warm-up still runs per worker in the startup event
+    load_resources(run_warmup=False)
+    # keep the GC from writing to (and so un-sharing) the pages of objects loaded so far
+    gc.freeze()
+
+
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated):
+    # backpressure: fail fast instead of queueing behind a saturated pool
+    POOL_REJECTIONS.inc(pool=exc.pool)
+    return JSONResponse(
+        status_code=503,
+        content={"error": "Server busy", "details": {"pool": exc.pool}},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.on_event("startup")
+def start_loading():
+    # load in the background so /health/live answers immediately;
+    # requests arriving early block in the registry until their resource is loaded
+    if STARTUP_LOAD == "eager":
+        threading.Thread(
+            target=load_resources, kwargs={"run_warmup": WARMUP}, name="resource-startup", daemon=True
+        ).start()
+    if ARTIFACT_WATCH_INTERVAL > 0:
+        threading.Thread(
+            target=watch_artifacts, args=(ARTIFACT_WATCH_INTERVAL, _stop_watcher), name="artifact-watcher", daemon=True
+        ).start()
+
+
+@app.on_event("shutdown")
+def shutdown_pools():
+    _stop_watcher.set()
+    for pool in POOLS:
+        pool.shutdown()
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     start = time.time()
-    response = await call_next(request)
+    HTTP_IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+    finally:
+        HTTP_IN_FLIGHT.dec()
     duration = (time.time()-start) * 1000
 
+    # label by route template so path parameters cannot blow up cardinality
+    route = request.scope.get("route")
+    path = route.path if route is not None else "unmatched"
+    HTTP_REQUESTS.inc(method=request.method, path=path, status=response.status_code)
+    HTTP_LATENCY.observe(duration / 1000, path=path)
+
     logger.info(
-            f"{request.method} {request.url.path} | status = {response.status_code} | {duration:.2f}ms"
+            "request",
+            extra={"method": request.method, "path": request.url.path,
+                   "status": response.status_code, "duration_ms": round(duration, 2)},
             )
     return response
 
@@ -43,26 +124,106 @@ def root():
     return {"status": "ok", "message": "Domain Intelligence System API running"}
 
 
-@app.post("/predict", response_model=PredictResponse, responses={400: {"model": ErrorResponse}})
-def predict(customer: dict, _:str = Depends(verify_api_key)):
+@app.get("/health/live")
+def health_live():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+def health_ready():
+    status = resource_status()
+    # lazy mode loads on demand, so the worker can take traffic right away
+    if STARTUP_LOAD == "lazy":
+        ready = True
+    else:
+        ready = status["all_loaded"] and (status["warmed_up"] or not WARMUP)
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "loading", "mode": STARTUP_LOAD, **status},
+    )
+
+
+@app.get("/stats")
+def stats(_:str = Depends(verify_api_key)):
+    return {
+        "embedding_cache": embedding_cache_stats(),
+        "ask_batching": ask_batch_stats(),
+        "pools": {pool.name: {"in_flight": pool.in_flight, "capacity": pool.capacity} for pool in POOLS},
+    }
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    # Prometheus text format, per worker process
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE)
+
+
+@app.post("/predict", response_model=PredictResponse, responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def predict(customer: dict, _:str = Depends(verify_api_key)):
 
     try:
-        return predict_service(customer)
+        return await predict_pool.run(predict_service, customer)
+    except PoolSaturated:
+        raise
     except Exception as e:
         return {"error": "Prediction failed", "details": {"message": str(e)}}
 
-@app.post("/ask", response_model=AskResponse, responses={400: {"model": ErrorResponse}})
-def ask(req: AskRequest, _:str = Depends(verify_api_key)):
+@app.post("/predict/batch", response_model=PredictBatchResponse, responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def predict_batch(req: PredictBatchRequest, _:str = Depends(verify_api_key)):
     try:
-        results = ask_service(req.question, top_k=req.top_k)
-        return {"question": req.question, "results": results}
+        customers = req.columns if req.columns is not None else (req.customers or [])
+        return await batch_pool.run(predict_many, customers)
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        return {"error": "Batch prediction failed", "details": {"message": str(e)}}
+
+@app.post("/ask", response_model=AskResponse, responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def ask(req: AskRequest, _:str = Depends(verify_api_key)):
+    try:
+        search_filter = make_filter(req.sources, req.pages)
+        future = submit_ask(req.question, req.top_k, search_filter)
+        if future is not None:
+            # micro-batched with other in-flight questions (one encode + one search per batch)
+            out = await asyncio.wrap_future(future)
+        else:
+            q_emb = await embed_pool.run(embed_query, req.question)
+            out = await search_pool.run(search_query, req.question, q_emb, req.top_k, search_filter)
+        return {"question": req.question, **out}
+    except PoolSaturated:
+        raise
     except Exception as e:
         return {"error": "RAG retrieval failed", "details": {"message": str(e)}}
 
-@app.post("/recommend", response_model=RecommendResponse, responses={400: {"model": ErrorResponse}})
-def recommend(customer: dict, _:str = Depends(verify_api_key)):
+@app.post("/ask/batch", response_model=AskBatchResponse, responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def ask_batch(req: AskBatchRequest, _:str = Depends(verify_api_key)):
+    try:
+        items = [(q.question, q.top_k, make_filter(q.sources, q.pages)) for q in req.questions]
+        batch = await embed_pool.run(ask_many, items) if items else []
+        return {"results": [
+            {"question": q.question, **out} for q, out in zip(req.questions, batch)
+        ]}
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        return {"error": "Batch RAG retrieval failed", "details": {"message": str(e)}}
+
+@app.post("/recommend", response_model=RecommendResponse, responses={400: {"model": ErrorResponse}, 503: {"model": ErrorResponse}})
+async def recommend(customer: dict, _:str = Depends(verify_api_key)):
     try:
-        return recommend_service(customer)
+        # retrieval is precomputed per risk tier, so this is model scoring + a dict merge
+        return await predict_pool.run(recommend_service, customer)
+    except PoolSaturated:
+        raise
     except Exception as e:
         return {"error": "Recommendation failed", "details": {"message": str(e)}}
 
+@app.post("/admin/reload", response_model=ReloadResponse, responses={404: {"model": ErrorResponse}, 409: {"model": ErrorResponse}})
+async def admin_reload(req: ReloadRequest, _:str = Depends(verify_api_key)):
+    # load + validate run off the event loop; traffic keeps using the current versions until the swap
+    try:
+        return await asyncio.to_thread(reload_artifacts, req.model_version, req.index_version)
+    except FileNotFoundError as e:
+        return JSONResponse(status_code=404, content={"error": "Artifact not found", "details": {"message": str(e)}})
+    except Exception as e:
+        return JSONResponse(status_code=409, content={"error": "Reload rejected", "details": {"message": str(e)}})
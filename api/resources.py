@@ -0,0 +1,135 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+_MISSING = object()
+
+
+class ResourceRegistry:
+    """
+    Named, lazily loaded resources (models, indexes, ...).
+
+    Each resource has a loader and optional dependencies. get() loads a
+    resource (and its dependencies) on first use; load_all() loads everything
+    in parallel. Load time and errors are recorded per resource for the
+    readiness probe.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._deps: Dict[str, tuple] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._values: Dict[str, Any] = {}
+        self._load_ms: Dict[str, float] = {}
+        self._errors: Dict[str, str] = {}
+        self._swap_lock = threading.Lock()
+        self.warmed_up = False
+        self.warmup_ms: float | None = None
+        self.warmup_error: str | None = None
+
+    def register(self, name: str, loader: Callable[[], Any], depends_on: tuple = ()):
+        self._loaders[name] = loader
+        self._deps[name] = tuple(depends_on)
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        value = self._values.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._locks[name]:
+            # another thread may have finished loading while we waited
+            value = self._values.get(name, _MISSING)
+            if value is _MISSING:
+                value = self._load(name)
+            return value
+
+    def _load(self, name: str) -> Any:
+        for dep in self._deps[name]:
+            self.get(dep)
+        start = time.perf_counter()
+        try:
+            value = self._loaders[name]()
+        except Exception as e:
+            self._errors[name] = str(e)
+            raise
+        self.swap(name, value, load_ms=(time.perf_counter() - start) * 1000)
+        return value
+
+    def swap(self, name: str, value: Any, load_ms: float | None = None):
+        """
+        Atomically replace a resource. The values dict is copied and rebound,
+        so readers see either the old or the new object, and requests that
+        already hold the old object keep using it until they finish.
+        """
+        with self._swap_lock:
+            values = dict(self._values)
+            values[name] = value
+            self._values = values
+            self._errors.pop(name, None)
+            if load_ms is not None:
+                self._load_ms[name] = load_ms
+
+    def swap_many(self, values: Dict[str, Any]):
+        """
+        Replace several resources in one step (see swap).
+        """
+        with self._swap_lock:
+            merged = dict(self._values)
+            merged.update(values)
+            self._values = merged
+            for name in values:
+                self._errors.pop(name, None)
+
+    def load_all(self, max_workers: int = 4):
+        """
+        Load every registered resource in parallel (dependencies are awaited
+        through get()). Errors are recorded, not raised.
+        """
+        def load(name):
+            try:
+                self.get(name)
+            except Exception:
+                pass
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="resource-loader") as pool:
+            list(pool.map(load, self._loaders))
+
+    def record_error(self, name: str, error: str):
+        self._errors[name] = error
+
+    def warmup(self, fn: Callable[[], None]):
+        """
+        Run fn once; a failure is recorded for the readiness probe and raised.
+        """
+        start = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            self.warmup_error = str(e)
+            raise
+        self.warmup_ms = (time.perf_counter() - start) * 1000
+        self.warmup_error = None
+        self.warmed_up = True
+
+    def peek(self, name: str) -> Any:
+        # current value without triggering a load (None if not loaded)
+        return self._values.get(name)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._values
+
+    def all_loaded(self) -> bool:
+        return all(name in self._values for name in self._loaders)
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        values = self._values
+        return {
+            name: {
+                "loaded": name in values,
+                "version": getattr(values.get(name), "version", None),
+                "load_ms": round(self._load_ms[name], 2) if name in self._load_ms else None,
+                "error": self._errors.get(name),
+            }
+            for name in self._loaders
+        }
@@ -1,26 +1,61 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Dict, Any
 
+from api.config import ASK_MAX_TOP_K
+
 class PredictResponse(BaseModel):
     churn_prediction: int
     churn_probability: float
     risk: str
+    model_version: str | None = None
+
+
+class PredictBatchRequest(BaseModel):
+    # either row-wise customers or a columnar {feature: [values...]} payload
+    customers: List[Dict[str, Any]] | None = None
+    columns: Dict[str, List[Any]] | None = None
+
+
+class PredictBatchResponse(BaseModel):
+    count: int
+    churn_prediction: List[int]
+    churn_probability: List[float]
+    risk: List[str]
+    model_version: str | None = None
 
 
 class AskRequest(BaseModel):
     question: str
-    top_k: int = 5
+    top_k: int = Field(5, ge=1, le=ASK_MAX_TOP_K)
+    # only search chunks from these PDFs / page numbers (None = all)
+    sources: List[str] | None = None
+    pages: List[int] | None = None
 
 
 class AskResult(BaseModel):
+    # chunk id within index_version
+    id: int | None = None
     text: str
     source: str
     page: int
-    distance: float
+    # last page of a chunk spanning several pages (== page otherwise)
+    page_end: int | None = None
+    # L2 distance; None for chunks found only by the lexical (BM25) side of hybrid search
+    distance: float | None = None
+    # reciprocal rank fusion score (hybrid search only)
+    score: float | None = None
 
 class AskResponse(BaseModel):
     question: str
     results: List[AskResult]
+    index_version: str | None = None
+
+class AskBatchRequest(BaseModel):
+    questions: List[AskRequest]
+
+
+class AskBatchResponse(BaseModel):
+    results: List[AskResponse]
 
 class RetentionAction(BaseModel):
     title: str
@@ -35,6 +70,20 @@ class RecommendResponse(BaseModel):
     recommended_text: str
     sources: List[str]
     actions: List[RetentionAction]
+    model_version: str | None = None
+    index_version: str | None = None
+
+
+class ReloadRequest(BaseModel):
+    # None = newest version found under ARTIFACT_ROOT
+    model_version: str | None = None
+    index_version: str | None = None
+
+
+class ReloadResponse(BaseModel):
+    swapped: Dict[str, str]
+    model_version: str | None = None
+    index_version: str | None = None
 
 class ErrorResponse(BaseModel):
     error: str
@@ -1,26 +1,158 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, NamedTuple
+import threading
 import joblib
+import numpy as np
 import pandas as pd
-import pickle
-import faiss
-from sentence_transformers import SentenceTransformer
-from rag.action_parser import parse_policy_actions
-from api.logger import get_logger
+from rag.action_parser import ActionCache
+from rag.embedders import load_embedder
+from rag.embedding_cache import EmbeddingCache
+from rag.index_factory import read_index, search_filtered
+from rag.lexical import LexicalIndex, lexical_exists, rrf_fuse
+from rag.meta_store import MetaStore, page_label
+from api.batching import MicroBatcher
+from api.resources import ResourceRegistry
+from api import artifacts
+from api.metrics import registry as metrics, STAGE_LATENCY, ASK_BATCH_SIZE
+from ml.compiled_model import CompiledChurnModel
+from api.logger import get_logger, sampled
+from api.config import (
+    PREDICT_BLOCK_SIZE,
+    COMPILED_PREDICT,
+    EMBED_CACHE_SIZE,
+    ASK_BATCHING,
+    ASK_BATCH_MAX_SIZE,
+    ASK_BATCH_WAIT_MS,
+    ASK_BATCH_QUEUE,
+    INDEX_MMAP,
+    RAG_LOG_SAMPLE_RATE,
+    ASK_MAX_TOP_K,
+    HYBRID_SEARCH,
+    HYBRID_CANDIDATES,
+    RRF_K,
+)
 
 logger = get_logger()
 
-# Paths
-MODEL_PATH = "models/churn_model.joblib"
-INDEX_DIR = "rag/index"
 EMBED_MODEL = "all-MiniLM-L6-v2"
 
-_model = joblib.load(MODEL_PATH)
+# models and indexes are loaded by the registry (at startup or on first use, see api.main)
+_registry = ResourceRegistry()
 
-_faiss_index = faiss.read_index(f"{INDEX_DIR}/docs.index")
-with open(f"{INDEX_DIR}/docs_meta.pkl", "rb") as f:
-    _docs_meta = pickle.load(f)
 
-_embedder = SentenceTransformer(EMBED_MODEL)
+class ModelBundle(NamedTuple):
+    version: str
+    pipeline: Any
+    compiled: CompiledChurnModel | None
+
+
+class IndexBundle(NamedTuple):
+    version: str
+    index: Any
+    meta: MetaStore
+    # BM25 index built next to docs.index (None for indexes built before it existed)
+    lexical: LexicalIndex | None
+    # risk -> precomputed policy payload (message, recommended_text, sources, actions)
+    recommendations: Dict[str, Dict[str, Any]] | None
+    # parsed policy chunks by chunk id (ids are per index version)
+    actions: ActionCache
+
+
+def _load_model(version: str | None = None) -> ModelBundle:
+    version = version or artifacts.latest_model_version()
+    pipeline = joblib.load(artifacts.model_path(version))
+
+    # fast path for single-row scoring; falls back to the Pipeline if the model shape is unsupported
+    compiled = None
+    if COMPILED_PREDICT:
+        try:
+            compiled = CompiledChurnModel.from_pipeline(pipeline)
+        except ValueError as e:
+            logger.warning("compiled_predict_disabled", extra={"reason": str(e)})
+    logger.info("model_loaded", extra={"version": version})
+    return ModelBundle(version, pipeline, compiled)
+
+
+def _load_index(version: str | None = None) -> IndexBundle:
+    version = version or artifacts.latest_index_version()
+    path = artifacts.index_dir(version)
+    # honours the index type's stored search params (nprobe / efSearch)
+    meta = MetaStore(path)
+    lexical = LexicalIndex(path, meta) if lexical_exists(path) else None
+    bundle = IndexBundle(version, read_index(path, mmap=INDEX_MMAP), meta, lexical, None, ActionCache())
+    # recommendations depend on the index, so they are built with (and swapped together with) it
+    bundle = bundle._replace(recommendations=_build_recommendations(bundle))
+    logger.info("index_loaded", extra={"version": version, "vectors": int(bundle.index.ntotal)})
+    return bundle
+
+
+class SearchFilter(NamedTuple):
+    # None = no restriction
+    sources: tuple | None
+    pages: tuple | None
+
+
+def make_filter(sources: List[str] | None = None, pages: List[int] | None = None) -> SearchFilter | None:
+    if sources is None and pages is None:
+        return None
+    return SearchFilter(
+        tuple(sorted(set(sources))) if sources is not None else None,
+        tuple(sorted(set(pages))) if pages is not None else None,
+    )
+
+
+# targeted queries to retrieve "actions", not definitions
+RISK_QUERIES = {
+    "high": (
+        "High risk customers churn probability >= 0.70 retention actions: "
+        "RET10 discount, plan upgrade offer, premium support add-on, contract lock-in, escalation within 12 hours"
+    ),
+    "medium": (
+        "Medium risk customers churn probability 0.50 to 0.69 retention actions: "
+        "RET5 discount, service quality check, customer education, diagnostics"
+    ),
+    "low": (
+        "Low risk customers churn probability < 0.50 recommended actions: "
+        "engagement newsletters loyalty benefits plan suggestions"
+    ),
+}
+
+_embed_cache = EmbeddingCache(max_size=EMBED_CACHE_SIZE)
+
+
+def _encode_one(text: str) -> np.ndarray:
+    embedder = _registry.get("embedder")
+    with STAGE_LATENCY.time(stage="embed"):
+        return embedder.encode([text], convert_to_numpy=True)[0]
+
+
+def embed_query(question: str) -> np.ndarray:
+    """
+    Query embedding (float32, shape (dim,)), served from the LRU cache when possible.
+    """
+    return _embed_cache.get_or_encode(question, _encode_one)
+
+
+def embed_queries(questions: List[str]) -> np.ndarray:
+    """
+    Embed many questions: cache hits are reused, all misses go through one encode call.
+    Returns a float32 (n, dim) matrix.
+    """
+    vectors = [_embed_cache.get(q) for q in questions]
+    misses = [i for i, v in enumerate(vectors) if v is None]
+    if misses:
+        embedder = _registry.get("embedder")
+        with STAGE_LATENCY.time(stage="embed"):
+            encoded = embedder.encode([questions[i] for i in misses], convert_to_numpy=True)
+        for i, vec in zip(misses, encoded):
+            _embed_cache.put(questions[i], vec)
+            vectors[i] = vec
+    return np.vstack(vectors).astype("float32", copy=False)
+
+
+def _load_risk_query_embeddings() -> Dict[str, np.ndarray]:
+    # risk-tier queries are fixed: embed them once so /recommend never pays an encoder pass
+    # (kept outside the LRU so /ask traffic cannot evict them)
+    return {risk: embed_query(q) for risk, q in RISK_QUERIES.items()}
 
 
 def _risk_from_proba(proba: float) -> str:
@@ -36,9 +168,13 @@ def predict_service(customer: Dict[str, Any]) -> Dict[str, Any]:
     Predict churn for a single customer dict.
     customer keys must match training features.
     """
-    X = pd.DataFrame([customer])
-
-    proba = float(_model.predict_proba(X)[0][1])
+    model = _registry.get("model")
+    with STAGE_LATENCY.time(stage="predict"):
+        if model.compiled is not None:
+            proba = model.compiled.predict_proba_one(customer)
+        else:
+            X = pd.DataFrame([customer])
+            proba = float(model.pipeline.predict_proba(X)[0][1])
     pred = int(proba >= 0.5)
     risk = _risk_from_proba(proba)
 
@@ -46,124 +182,292 @@ def predict_service(customer: Dict[str, Any]) -> Dict[str, Any]:
         "churn_prediction": pred,
         "churn_probability": round(proba, 4),
         "risk": risk,
+        "model_version": model.version,
+    }
+
+
+def _risk_from_probas(probas: np.ndarray) -> np.ndarray:
+    # vectorized version of _risk_from_proba
+    return np.where(probas >= 0.7, "high", np.where(probas >= 0.5, "medium", "low"))
+
+
+def _iter_blocks(customers, block_size: int):
+    """
+    Yield DataFrames of at most block_size rows from a list of customer
+    dicts, a columnar {feature: [values]} dict or a DataFrame.
+    """
+    if isinstance(customers, pd.DataFrame):
+        for start in range(0, len(customers), block_size):
+            yield customers.iloc[start:start + block_size]
+        return
+
+    if isinstance(customers, dict):
+        lengths = {len(v) for v in customers.values()}
+        if len(lengths) > 1:
+            raise ValueError("All columns must have the same number of values")
+        n = lengths.pop() if lengths else 0
+        for start in range(0, n, block_size):
+            yield pd.DataFrame({k: v[start:start + block_size] for k, v in customers.items()})
+        return
+
+    for start in range(0, len(customers), block_size):
+        yield pd.DataFrame(customers[start:start + block_size])
+
+
+def predict_many(customers, block_size: int = PREDICT_BLOCK_SIZE) -> Dict[str, Any]:
+    """
+    Predict churn for many customers at once.
+    Accepts a list of customer dicts, a columnar {feature: [values]} dict
+    or a DataFrame; the pipeline runs once per block of block_size rows.
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be >= 1")
+
+    model = _registry.get("model")
+    blocks = []
+    for X in _iter_blocks(customers, block_size):
+        # own series: a block takes far longer than the single-row "predict" stage
+        with STAGE_LATENCY.time(stage="predict_batch"):
+            blocks.append(model.pipeline.predict_proba(X)[:, 1])
+    probas = np.concatenate(blocks) if blocks else np.empty(0)
+
+    return {
+        "count": int(probas.shape[0]),
+        "churn_prediction": (probas >= 0.5).astype(int).tolist(),
+        "churn_probability": np.round(probas, 4).tolist(),
+        "risk": _risk_from_probas(probas).tolist(),
+        "model_version": model.version,
     }
 
 
-def ask_service(question: str, top_k: int = 5) -> List[Dict[str, Any]]:
+def _search_many(q_embs: np.ndarray, top_ks: List[int], bundle: IndexBundle,
+                 queries: List[str] | None = None,
+                 filters: List[SearchFilter | None] | None = None) -> List[List[Dict[str, Any]]]:
     """
-    RAG retrieval: returns top_k document chunks with metadata.
+    One FAISS search over the stacked query matrix with the largest k,
+    then each row is cut down to its own top_k.
+
+    Queries with a source/page filter are searched on their own with the
+    allowed ids pushed into FAISS as an IDSelector (see search_filtered), so
+    they return top_k chunks from the requested documents whenever that many exist.
+
+    With the query texts and a lexical index (HYBRID_SEARCH), FAISS and BM25
+    each return HYBRID_CANDIDATES chunks and the two rankings are fused with
+    reciprocal rank fusion; lexical-only hits have no distance.
     """
-    q_emb = _embedder.encode([question], convert_to_numpy=True).astype("float32")
-    distances, ids = _faiss_index.search(q_emb, top_k)
+    n = len(top_ks)
+    filters = filters or [None] * n
+    hybrid = HYBRID_SEARCH and queries is not None and bundle.lexical is not None
+    k = max(max(top_ks), HYBRID_CANDIDATES) if hybrid else max(top_ks)
+
+    ids = np.full((n, k), -1, dtype="int64")
+    distances = np.full((n, k), np.inf, dtype="float32")
+    allowed_rows = [None] * n
+    with STAGE_LATENCY.time(stage="search"):
+        plain = [i for i in range(n) if filters[i] is None]
+        if plain:
+            distances[plain], ids[plain] = bundle.index.search(q_embs[plain], k)
+    for i in range(n):
+        if filters[i] is None:
+            continue
+        rows = bundle.meta.filter_rows(filters[i].sources, filters[i].pages)
+        allowed_rows[i] = rows
+        with STAGE_LATENCY.time(stage="filtered_search"):
+            distances[i:i + 1], ids[i:i + 1] = search_filtered(
+                bundle.index, q_embs[i:i + 1], k, np.asarray(bundle.meta.ids[rows])
+            )
+
+    # per query: [(chunk id, distance or None, fused score or None)]
+    ranked = []
+    for i, (row_ids, row_dist, top_k) in enumerate(zip(ids, distances, top_ks)):
+        if not hybrid:
+            # idx < 0: fewer than top_k vectors in the index (or matching the filter)
+            ranked.append([(idx, float(d), None) for idx, d in zip(row_ids[:top_k], row_dist[:top_k]) if idx >= 0])
+            continue
+        with STAGE_LATENCY.time(stage="lexical"):
+            lex_ids, _ = bundle.lexical.search(queries[i], k, allowed_rows[i])
+        dist = {int(idx): float(d) for idx, d in zip(row_ids, row_dist) if idx >= 0}
+        fused = rrf_fuse([row_ids, lex_ids], top_k, RRF_K)
+        ranked.append([(idx, dist.get(idx), score) for idx, score in fused])
+
+    batch = []
+    with STAGE_LATENCY.time(stage="meta"):
+        for hits in ranked:
+            results = []
+            for idx, dist, score in hits:
+                chunk = bundle.meta[idx]
+                result = {
+                    "id": int(idx),
+                    "text": chunk["text"],
+                    "source": chunk["source"],
+                    "page": int(chunk["page"]),
+                    "page_end": int(chunk["page_end"]),
+                    "distance": dist,
+                }
+                if score is not None:
+                    result["score"] = score
+                results.append(result)
+            batch.append(results)
+    return batch
+
+
+def _search(q_emb: np.ndarray, top_k: int, bundle: IndexBundle, query: str | None = None,
+            search_filter: SearchFilter | None = None) -> List[Dict[str, Any]]:
+    return _search_many(
+        q_emb.reshape(1, -1), [top_k], bundle, None if query is None else [query], [search_filter]
+    )[0]
 
-    results = []
-    for idx, dist in zip(ids[0], distances[0]):
-        chunk = _docs_meta[idx]
-        results.append({
-            "text": chunk["text"],
-            "source": chunk["source"],
-            "page": int(chunk["page"]),
-            "distance": float(dist),
+
+def _check_top_k(top_k: int):
+    # the search arrays are sized by the largest top_k of a batch
+    if not 1 <= top_k <= ASK_MAX_TOP_K:
+        raise ValueError(f"top_k must be between 1 and {ASK_MAX_TOP_K}")
+
+
+def _log_rag_ask(question: str, results: List[Dict[str, Any]]):
+    # high volume: sampled, and the sources list is only built for records that are kept
+    if sampled(RAG_LOG_SAMPLE_RATE):
+        logger.info("rag_ask", extra={
+            "query": question, "sources": [(r["source"], r["page"], r["page_end"]) for r in results[:3]],
         })
-    logger.info(f"RAG ASK query='{question}' | sources={[ (r['source'], r['page']) for r in results[:3] ]}")
-    return results
 
 
-def recommend_service(customer: Dict[str, Any]) -> Dict[str, Any]:
+def search_query(question: str, q_emb: np.ndarray, top_k: int = 5,
+                 search_filter: SearchFilter | None = None) -> Dict[str, Any]:
     """
-    ML prediction + policy grounded recommendation text + citations.
-    (No LLM: extractive + safe)
+    FAISS search for an already embedded question.
+    Returns {"results": [...], "index_version": ...}.
     """
-    pred_out = predict_service(customer)
-    risk = pred_out["risk"]
+    _check_top_k(top_k)
+    bundle = _registry.get("index")
+    results = _search(q_emb, top_k, bundle, question, search_filter)
+    _log_rag_ask(question, results)
+    return {"results": results, "index_version": bundle.version}
+
+
+def ask_many(items: List[tuple]) -> List[Dict[str, Any]]:
+    """
+    Retrieval for many (question, top_k, SearchFilter or None) items: the questions
+    are encoded together and the unfiltered ones searched with one FAISS call
+    using the largest top_k.
+    Used by /ask/batch and by the /ask micro-batcher.
+    Returns one {"results": [...], "index_version": ...} per item.
+    """
+    for _, top_k, _ in items:
+        _check_top_k(top_k)
+    bundle = _registry.get("index")
+    ASK_BATCH_SIZE.observe(len(items))
+    questions = [q for q, _, _ in items]
+    batch = _search_many(
+        embed_queries(questions), [k for _, k, _ in items], bundle, questions, [f for _, _, f in items]
+    )
+    for question, results in zip(questions, batch):
+        _log_rag_ask(question, results)
+    return [{"results": results, "index_version": bundle.version} for results in batch]
+
+
+_ask_batcher = (
+    MicroBatcher(
+        ask_many,
+        max_batch=ASK_BATCH_MAX_SIZE,
+        max_wait_ms=ASK_BATCH_WAIT_MS,
+        max_queue=ASK_BATCH_QUEUE,
+        name="ask-batcher",
+    )
+    if ASK_BATCHING else None
+)
+
+
+def submit_ask(question: str, top_k: int = 5, search_filter: SearchFilter | None = None):
+    """
+    Queue a question for the /ask micro-batcher; returns a Future with the results.
+    None if batching is disabled (ASK_BATCHING=0).
+    """
+    if _ask_batcher is None:
+        return None
+    # rejected here, before it can share (and fail) a batch with other requests
+    _check_top_k(top_k)
+    return _ask_batcher.submit((question, top_k, search_filter))
+
+
+def ask_service(question: str, top_k: int = 5, sources: List[str] | None = None,
+                pages: List[int] | None = None) -> List[Dict[str, Any]]:
+    """
+    RAG retrieval: returns top_k document chunks with metadata,
+    optionally only from the given source PDFs / page numbers.
+    """
+    search_filter = make_filter(sources, pages)
+    future = submit_ask(question, top_k, search_filter)
+    if future is not None:
+        return future.result()["results"]
+    return search_query(question, embed_query(question), top_k, search_filter)["results"]
+
+
+def ask_batch_stats() -> Dict[str, Any]:
+    return _ask_batcher.stats() if _ask_batcher is not None else {}
 
-    # targeted query to retrieve "actions", not definitions
-    if risk == "high":
-        rag_query = (
-                "High risk customers churn probability >= 0.70 retention actions: "
-                "RET10 discount, plan upgrade offer, premium support add-on, contract lock-in, escalation within 12 hours"
-        )
-    elif risk == "medium":
-        rag_query = (
-                "Medium risk customers churn probability 0.50 to 0.69 retention actions: "
-                "RET5 discount, service quality check, customer education, diagnostics"
-                )
-    else:
-        rag_query = (
-                "Low risk customers churn probability < 0.50 recommended actions: "
-                "engagement newsletters loyalty benefits plan suggestions"
-                )
 
+def embedding_cache_stats() -> Dict[str, Any]:
+    return _embed_cache.stats()
 
-    results = ask_service(rag_query, top_k=8)
-    logger.info(f"RECOMMEND risk={risk} | sources={[ (r['source'], r['page']) for r in results[:3] ]}")
 
-    # keep only retention policy chunks
-    results = [r for r in results if r["source"] == "RetentionPolicy.pdf"]
+metrics.counter("embedding_cache_hits_total", "Query embedding cache hits", fn=lambda: _embed_cache.hits)
+metrics.counter("embedding_cache_misses_total", "Query embedding cache misses", fn=lambda: _embed_cache.misses)
+metrics.gauge("embedding_cache_hit_ratio", "Query embedding cache hit rate", fn=lambda: _embed_cache.stats()["hit_rate"])
+metrics.gauge("embedding_cache_size", "Entries in the query embedding cache", fn=lambda: len(_embed_cache))
+metrics.gauge("ask_batcher_queued", "Questions waiting for the /ask micro-batcher",
+              fn=lambda: ask_batch_stats().get("queued", 0))
+metrics.gauge("ask_batcher_mean_batch_size", "Mean /ask micro-batch size",
+              fn=lambda: ask_batch_stats().get("mean_batch_size", 0.0))
+
+
+RISK_MESSAGES = {
+    "low": "Low churn risk. No discount offer required. Maintain engagement and loyalty benefits.",
+    "medium": "Medium churn risk. Recommend light retentionactions like RET5 discount + service quality check.",
+    "high": "High churn risk. Apply immediate retention actions (RET10, upgrade offers, premium support, escalation)",
+}
+
+_POLICY_FILTER = make_filter(sources=["RetentionPolicy.pdf"])
+
+
+def _build_recommendation(risk: str, bundle: IndexBundle) -> Dict[str, Any]:
+    """
+    Policy grounded payload for one risk tier.
+    Depends only on the risk tier and the index, so it is computed once per index load.
+    """
+    message = RISK_MESSAGES[risk]
+    # hybrid: the BM25 side ranks chunks containing the query's policy codes (RET10, RET5, ...) first;
+    # the search only scans retention policy chunks
+    results = _search(
+        _registry.get("risk_query_embeddings")[risk], 8, bundle, RISK_QUERIES[risk], _POLICY_FILTER
+    )
 
     if not results:
         return {
-            **pred_out,
+            "message": message,
             "recommended_text": "No retention policy evidence found in indexed documents.",
-            "sources": []
+            "sources": [],
+            "actions": [],
         }
 
-    # pick best chunk containing actions keywords
-    keywords = [
-        "Recommended actions",
-        "RET10",
-        "RET5",
-        "Plan Upgrade",
-        "Premium Support",
-        "Contract Lock-in",
-        "Escalation",
-        "within 24 hours",
-        "within 12 hours",
-        "discount",
-    ]
-
     action_chunk = results[0]
-    for r in results:
-        t = r["text"].lower()
-        if any(k.lower() in t for k in keywords):
-            action_chunk = r
-            break
-
-    # format recommendation
-    text = " ".join(action_chunk["text"].split())
-    actions = parse_policy_actions(action_chunk["text"])
-    if risk == "low":
-        actions = []
-    marker = "Recommended actions:"
-    if marker.lower() in text.lower():
-        idx = text.lower().find(marker.lower())
-        text = text[idx + len(marker):].strip()
-
-    # nicer formatting
-    for m in ["1.", "2.", "3.", "4.", "5.", "6."]:
-        text = text.replace(m, f"\n{m}")
-    text = text.replace("○", "\n  -")
-
-    recommended_text = text[:2500]
+
+    # actions and display text come from one parse of the chunk
+    with STAGE_LATENCY.time(stage="parse"):
+        parsed = bundle.actions.get(action_chunk["id"], action_chunk["text"])
+    actions = [] if risk == "low" else parsed.actions
+    recommended_text = parsed.display[:2500]
 
     # sources (unique)
     sources = []
     seen = set()
     for r in results[:6]:
-        key = (r["source"], r["page"])
+        key = (r["source"], r["page"], r["page_end"])
         if key not in seen:
             seen.add(key)
-            sources.append(f"{r['source']} (page {r['page']})")
-    
-    if risk=="low":
-        message = "Low churn risk. No discount offer required. Maintain engagement and loyalty benefits."
-    elif risk == "medium":
-        message = "Medium churn risk. Recommend light retentionactions like RET5 discount + service quality check."
-    else:
-        message = "High churn risk. Apply immediate retention actions (RET10, upgrade offers, premium support, escalation)"
+            sources.append(f"{r['source']} ({page_label(r)})")
 
     return {
-        **pred_out,
         "message": message,
         "recommended_text": recommended_text,
         "sources": sources,
@@ -171,3 +475,167 @@ def recommend_service(customer: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def recommend_service(customer: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    ML prediction + policy grounded recommendation text + citations.
+    (No LLM: extractive + safe)
+    """
+    pred_out = predict_service(customer)
+    risk = pred_out["risk"]
+
+    bundle = _registry.get("index")
+    rec = bundle.recommendations[risk]
+    if sampled(RAG_LOG_SAMPLE_RATE):
+        logger.info("recommend", extra={"risk": risk, "index_version": bundle.version, "sources": rec["sources"][:3]})
+
+    return {**pred_out, **rec, "index_version": bundle.version}
+
+
+def _build_recommendations(bundle: IndexBundle) -> Dict[str, Dict[str, Any]]:
+    return {risk: _build_recommendation(risk, bundle) for risk in RISK_QUERIES}
+
+
+def _dummy_customer(model: ModelBundle) -> Dict[str, Any]:
+    # a valid feature dict built from the fitted preprocessor (first category / 0.0)
+    pre = model.pipeline.named_steps["pre"]
+    customer = {}
+    for name, trans, cols in pre.transformers_:
+        if name == "remainder" or trans == "drop":
+            continue
+        if hasattr(trans, "categories_"):
+            customer.update({col: cats[0] for col, cats in zip(cols, trans.categories_)})
+        else:
+            customer.update({col: 0.0 for col in cols})
+    return customer
+
+
+def warmup():
+    """
+    Run one encode, one search and one prediction (single + batch path) so
+    lazy allocations and first-call overheads happen before real traffic.
+    """
+    q_emb = _registry.get("embedder").encode(["warm-up query"], convert_to_numpy=True).astype("float32")
+    _search_many(q_emb, [5], _registry.get("index"))
+    customer = _dummy_customer(_registry.get("model"))
+    predict_service(customer)
+    predict_many([customer])
+
+
+_registry.register("model", _load_model)
+_registry.register("embedder", lambda: load_embedder(EMBED_MODEL))
+_registry.register("risk_query_embeddings", _load_risk_query_embeddings, depends_on=("embedder",))
+_registry.register("index", _load_index, depends_on=("risk_query_embeddings",))
+
+
+def _validate_model(model: ModelBundle):
+    customer = _dummy_customer(model)
+    proba = float(model.pipeline.predict_proba(pd.DataFrame([customer]))[0][1])
+    if not 0.0 <= proba <= 1.0:
+        raise ValueError(f"Model {model.version} returned probability {proba}")
+    if model.compiled is not None and abs(model.compiled.predict_proba_one(customer) - proba) > 1e-6:
+        raise ValueError(f"Model {model.version}: compiled scorer disagrees with the pipeline")
+
+
+def _validate_index(bundle: IndexBundle):
+    if bundle.index.ntotal == 0 or bundle.index.ntotal != len(bundle.meta):
+        raise ValueError(
+            f"Index {bundle.version}: {bundle.index.ntotal} vectors but {len(bundle.meta)} metadata rows"
+        )
+    if bundle.lexical is not None and bundle.lexical.n_docs != len(bundle.meta):
+        raise ValueError(f"Index {bundle.version}: lexical index covers {bundle.lexical.n_docs} of {len(bundle.meta)} chunks")
+    dim = _registry.get("embedder").get_sentence_embedding_dimension()
+    if bundle.index.d != dim:
+        raise ValueError(f"Index {bundle.version}: dim {bundle.index.d} != embedder dim {dim}")
+    # every hit of a real query must resolve to a metadata row
+    _search(_registry.get("risk_query_embeddings")["high"], 5, bundle)
+
+
+_reload_lock = threading.Lock()
+
+
+def reload_artifacts(model_version: str | None = None, index_version: str | None = None) -> Dict[str, Any]:
+    """
+    Load, validate and atomically swap in a model / index version (None = latest).
+    Requests already running keep the objects they fetched and finish on the old version.
+    Both are loaded and validated before either is swapped; if anything fails
+    it raises and keeps serving the current model and index.
+    """
+    with _reload_lock:
+        # load and validate everything first, so a failure leaves both resources untouched
+        pending = {}
+        for name, requested, latest, load, validate in (
+            ("model", model_version, artifacts.latest_model_version, _load_model, _validate_model),
+            ("index", index_version, artifacts.latest_index_version, _load_index, _validate_index),
+        ):
+            target = requested or latest()
+            current = _registry.peek(name)
+            if current is not None and current.version == target:
+                continue
+            try:
+                new = load(target)
+                validate(new)
+            except Exception as e:
+                _registry.record_error(name, f"reload to {target} failed: {e}")
+                logger.error("reload_failed", extra={"resource": name, "version": target, "reason": str(e)})
+                raise
+            pending[name] = (new, current)
+
+        _registry.swap_many({name: new for name, (new, _) in pending.items()})
+        swapped = {}
+        for name, (new, current) in pending.items():
+            swapped[name] = new.version
+            logger.info("reload_swapped", extra={
+                "resource": name, "from_version": current.version if current else None, "version": new.version,
+            })
+
+        return {"swapped": swapped, **current_versions()}
+
+
+def current_versions() -> Dict[str, Any]:
+    model, index = _registry.peek("model"), _registry.peek("index")
+    return {
+        "model_version": model.version if model else None,
+        "index_version": index.version if index else None,
+    }
+
+
+def watch_artifacts(interval: float, stop: threading.Event):
+    """
+    Poll for newer artifact versions every interval seconds and hot-swap them.
+    """
+    while not stop.wait(interval):
+        try:
+            result = reload_artifacts()
+        except Exception:
+            # already logged; keep serving the current version and retry next tick
+            continue
+        if result["swapped"]:
+            logger.info("artifact_watcher_swapped", extra={"swapped": result["swapped"]})
+
+
+def load_resources(max_workers: int = 4, run_warmup: bool = True):
+    """
+    Load all resources in parallel, then warm up. Called from FastAPI startup.
+    """
+    _registry.load_all(max_workers=max_workers)
+    for name, status in _registry.status().items():
+        if status["error"] is not None:
+            logger.error("resource_load_failed", extra={"resource": name, "reason": status["error"]})
+    if run_warmup and _registry.all_loaded():
+        try:
+            _registry.warmup(warmup)
+        except Exception:
+            # runs on the startup thread, where nothing else would report it; /health/ready shows the error
+            logger.exception("warmup_failed")
+            return
+        logger.info("warmup_done", extra={"duration_ms": round(_registry.warmup_ms, 1)})
+
+
+def resource_status() -> Dict[str, Any]:
+    return {
+        "resources": _registry.status(),
+        "warmed_up": _registry.warmed_up,
+        "warmup_ms": round(_registry.warmup_ms, 2) if _registry.warmup_ms is not None else None,
+        "warmup_error": _registry.warmup_error,
+        "all_loaded": _registry.all_loaded(),
+    }
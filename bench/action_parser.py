@@ -0,0 +1,123 @@
+"""
+Action parsing throughput over all indexed chunks: the previous parser vs rag.action_parser.
+
+  legacy   parse_policy_actions + the recommendation formatting as they were before
+           the single-pass parser (copied below), i.e. two scans with re-compiled patterns
+  parse    rag.action_parser.parse_chunk: actions + display text in one pass
+  cached   ActionCache.get by chunk id, after one warm-up pass (what a repeated chunk costs)
+
+Every chunk is checked for identical actions and display text before timing. The legacy
+parser finds the marker in text.lower(), so characters whose lowercase form is longer
+("İ") before the marker shift its cut; such chunks are reported as mismatches.
+
+Run from the repo root (after building the index):
+    python -m bench.action_parser --repeat 5
+"""
+import argparse
+import re
+import time
+
+from rag.action_parser import ActionCache, parse_chunk
+from rag.meta_store import MetaStore
+
+INDEX_DIR = "rag/index"
+
+
+def legacy_parse(policy_chunk: str) -> list[dict]:
+    if not policy_chunk:
+        return []
+
+    text = " ".join(policy_chunk.replace("○", "-").split())
+
+    marker = "Recommended actions:"
+    if marker.lower() in text.lower():
+        idx = text.lower().find(marker.lower())
+        text = text[idx + len(marker):].strip()
+
+    parts = re.split(r"(\d\.\s)", text)
+
+    actions = []
+    buffer = ""
+
+    def flush_action(buf: str):
+        buf = buf.strip()
+        if not buf:
+            return
+        eligibility = ""
+        details = buf
+        if "Eligibility:" in buf:
+            details, eligibility = buf.split("Eligibility:", 1)
+            details = details.strip(" -")
+            eligibility = eligibility.strip()
+        title_candidate = details.split("-")[0].strip()
+        title_candidate = re.sub(r"\s+", " ", title_candidate)
+        if len(title_candidate) < 10:
+            title_candidate = " ".join(details.split()[:10])
+        actions.append({
+            "title": title_candidate.strip(),
+            "details": details.strip(),
+            "eligibility": eligibility.strip()
+        })
+
+    for p in parts:
+        if re.fullmatch(r"\d\.\s", p or ""):
+            flush_action(buffer)
+            buffer = ""
+        else:
+            buffer += " " + (p or "")
+    flush_action(buffer)
+
+    return [a for a in actions if a["details"]]
+
+
+def legacy_format(policy_chunk: str) -> str:
+    text = " ".join(policy_chunk.split())
+    marker = "Recommended actions:"
+    if marker.lower() in text.lower():
+        idx = text.lower().find(marker.lower())
+        text = text[idx + len(marker):].strip()
+    for m in ["1.", "2.", "3.", "4.", "5.", "6."]:
+        text = text.replace(m, f"\n{m}")
+    return text.replace("○", "\n  -")
+
+
+def legacy(text: str):
+    return legacy_parse(text), legacy_format(text)
+
+
+def throughput(fn, items: list, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            fn(item)
+    return len(items) * repeat / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="passes over all chunks per case")
+    args = parser.parse_args()
+
+    chunks = list(MetaStore(INDEX_DIR).items())
+    texts = [chunk["text"] for _, chunk in chunks]
+
+    mismatches = sum(legacy(t) != tuple(parse_chunk(t)) for t in texts)
+
+    cache = ActionCache(max_size=len(chunks))
+    for chunk_id, chunk in chunks:
+        cache.get(chunk_id, chunk["text"])
+
+    rates = {
+        "legacy": throughput(legacy, texts, args.repeat),
+        "parse": throughput(parse_chunk, texts, args.repeat),
+        "cached": throughput(lambda c: cache.get(c[0], c[1]["text"]), chunks, args.repeat),
+    }
+
+    print(f"{len(texts)} chunks, {args.repeat} passes, {mismatches} with output differing from legacy")
+    print(f"{'case':<8} {'chunks/s':>12} {'speedup':>8}")
+    for name, rate in rates.items():
+        print(f"{name:<8} {rate:>12.0f} {rate / rates['legacy']:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
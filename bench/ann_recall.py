@@ -0,0 +1,77 @@
+"""
+recall@k vs latency of approximate FAISS indexes against the exact flat index.
+
+Queries are held-out chunk embeddings (removed from the database), ground truth
+is IndexFlatL2 over the remaining chunks.
+
+Run from the repo root:
+    python -m bench.ann_recall --k 5 --queries 200
+"""
+import argparse
+import time
+
+import numpy as np
+import faiss
+
+from rag.embedders import load_embedder
+from rag.index_factory import build_faiss_index, apply_search_params
+from rag.meta_store import MetaStore
+
+INDEX_DIR = "rag/index"
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# (index_type, build params, [query-time params to sweep])
+GRID = [
+    ("flat", {}, [{}]),
+    ("ivf", {"nlist": 64}, [{"nprobe": p} for p in (1, 4, 8, 16, 32)]),
+    ("ivfpq", {"nlist": 64, "pq_m": 16}, [{"nprobe": p} for p in (4, 8, 16, 32)]),
+    ("hnsw", {"M": 32, "ef_construction": 200}, [{"ef_search": e} for e in (16, 32, 64, 128)]),
+]
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    texts = [m["text"] for m in MetaStore(INDEX_DIR).values()]
+
+    embedder = load_embedder(MODEL_NAME)
+    vectors = embedder.encode(texts, convert_to_numpy=True, show_progress_bar=True).astype("float32")
+
+    rng = np.random.default_rng(args.seed)
+    perm = rng.permutation(len(vectors))
+    n_q = min(args.queries, len(vectors) // 5)
+    queries, database = vectors[perm[:n_q]], vectors[perm[n_q:]]
+
+    exact = faiss.IndexFlatL2(database.shape[1])
+    exact.add(database)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"database={len(database)} queries={n_q} k={args.k}")
+    print(f"{'index':<8} {'params':<40} {'recall@k':>9} {'ms/query':>9}")
+    for index_type, build_params, sweep in GRID:
+        # build once per configuration, then sweep the query-time knobs
+        index, used = build_faiss_index(database, index_type=index_type, params=build_params)
+        for search_params in sweep:
+            apply_search_params(index, search_params)
+            used = {**used, **search_params}
+
+            start = time.perf_counter()
+            for q in queries:
+                index.search(q.reshape(1, -1), args.k)
+            ms = (time.perf_counter() - start) * 1000 / n_q
+
+            _, found = index.search(queries, args.k)
+            print(f"{index_type:<8} {str(used):<40} {recall_at_k(found, truth):>9.3f} {ms:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
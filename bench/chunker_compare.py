@@ -0,0 +1,206 @@
+"""
+Fixed-size vs semantic chunking over docs/*.pdf: chunk count, size and retrieval quality.
+
+For each chunker the PDFs are chunked, embedded and put in an exact flat
+index (in memory; rag/index is not touched). Reported per chunker:
+  chunks / tokens      number of chunks, mean and max estimated tokens per chunk
+  truncated            chunks over the embedder's 256-token input limit (their tail is not embedded)
+  near-dup             chunks sharing >= 50% of their words with the previous chunk (overlap)
+  index MB             serialized FAISS index + chunk text
+  embed s              time to embed all chunks
+  lost hdr             heading lines (semantic segmentation) missing from the chunk text; must be 0
+  stripped             words on the running header/footer and page-number lines the semantic chunker drops
+  lost words           other words of the extracted text missing from the chunks (word multisets per PDF);
+                       must be 0 for the semantic chunker (not checked for fixed windows, which cut words)
+  hit@k / MRR          over the eval questions: a hit is a result from the expected
+                       PDF (and page, when given) that contains the expected answer text (when given)
+
+Eval questions come from --queries (JSON lines with "question", "source" and
+optional "page" / "answer"), default: the built-in list below.
+
+Run from the repo root:
+    python -m bench.chunker_compare --k 5
+    python -m bench.chunker_compare --queries eval.jsonl --chunk-tokens 128 200
+"""
+import argparse
+from collections import Counter
+import json
+import os
+import time
+
+import numpy as np
+import faiss
+from pypdf import PdfReader
+
+from rag.chunker import MAX_TOKENS, chunk_pages, estimate_tokens, page_lines, page_text, segment
+from rag.embedders import MODEL_NAME, load_embedder
+
+DOCS_DIR = "docs"
+EMBED_LIMIT = 256
+
+EVAL = [
+    {"question": "What is the refund timeline?", "source": "RefundPolicy.pdf"},
+    {"question": "Which purchases are eligible for a refund?", "source": "RefundPolicy.pdf"},
+    {"question": "How do I cancel my contract early?", "source": "Termination.pdf"},
+    {"question": "What notice is required to terminate the service?", "source": "Termination.pdf"},
+    {"question": "What retention offers exist for high-risk customers?", "source": "RetentionPolicy.pdf"},
+    {"question": "Recommended actions for customers likely to churn", "source": "RetentionPolicy.pdf"},
+    {"question": "How quickly does customer support respond to complaints?", "source": "CustomerServicePolicy.pdf"},
+    {"question": "How can a customer escalate a support ticket?", "source": "CustomerServicePolicy.pdf"},
+    {"question": "What are the customer's obligations under the terms and conditions?", "source": "TermsCondition.pdf"},
+    {"question": "What happens if a payment is late?", "source": "TermsCondition.pdf"},
+]
+
+
+def fixed_chunks(pages: list[dict], source: str, chunk_size: int = 800, overlap: int = 150) -> list[dict]:
+    # same windows as chunk_text in rag/build_index.py (a script, not importable as rag.build_index)
+    chunks = []
+    for page in pages:
+        text = page["text"].replace("\n", " ").strip()
+        start = 0
+        while text and start < len(text):
+            chunks.append({"text": text[start:start + chunk_size], "source": source,
+                           "page": page["page_num"], "page_end": page["page_num"]})
+            start += chunk_size - overlap
+    return chunks
+
+
+def load_pages(extract) -> dict[str, list[dict]]:
+    # extract(pypdf page) -> text, as build_index extracts for the chunker being compared
+    docs = {}
+    for pdf in sorted(f for f in os.listdir(DOCS_DIR) if f.lower().endswith(".pdf")):
+        reader = PdfReader(os.path.join(DOCS_DIR, pdf))
+        docs[pdf] = [{"page_num": i + 1, "text": extract(p)} for i, p in enumerate(reader.pages)]
+    return docs
+
+
+def near_duplicates(chunks: list[dict]) -> int:
+    n = 0
+    for prev, cur in zip(chunks, chunks[1:]):
+        a, b = set(prev["text"].lower().split()), set(cur["text"].lower().split())
+        if a and b and len(a & b) >= 0.5 * min(len(a), len(b)):
+            n += 1
+    return n
+
+
+def lost_headings(docs: dict[str, list[dict]], chunks: list[dict]) -> int:
+    # every heading line has to reach some chunk (the action parser keys on "Recommended actions:")
+    text = {}
+    for c in chunks:
+        text[c["source"]] = text.get(c["source"], "") + "\n" + c["text"]
+    return sum(seg["text"] not in text.get(pdf, "")
+               for pdf, pages in docs.items() for seg in segment(pages) if seg["kind"] == "heading")
+
+
+def lost_words(docs: dict[str, list[dict]], chunks: list[dict]) -> tuple[int, int]:
+    # (words on stripped header/footer/page-number lines, other words of the page text missing from the chunks)
+    got = {}
+    for c in chunks:
+        got.setdefault(c["source"], Counter()).update(c["text"].split())
+    stripped = lost = 0
+    for pdf, pages in docs.items():
+        words = Counter(w for page in pages for w in page["text"].split())
+        kept = Counter(w for lines in page_lines(pages) for line in lines for w in line.split())
+        stripped += sum((words - kept).values())
+        lost += sum((kept - got.get(pdf, Counter())).values())
+    return stripped, lost
+
+
+def is_hit(chunk: dict, item: dict) -> bool:
+    if chunk["source"] != item["source"]:
+        return False
+    if "page" in item and not chunk["page"] <= item["page"] <= chunk["page_end"]:
+        return False
+    return "answer" not in item or " ".join(item["answer"].lower().split()) in " ".join(chunk["text"].lower().split())
+
+
+def evaluate(name: str, chunks: list[dict], embedder, eval_items: list[dict], k: int) -> dict:
+    start = time.perf_counter()
+    vectors = embedder.encode([c["text"] for c in chunks], convert_to_numpy=True).astype("float32")
+    embed_s = time.perf_counter() - start
+
+    index = faiss.IndexFlatL2(vectors.shape[1])
+    index.add(vectors)
+    q = embedder.encode([item["question"] for item in eval_items], convert_to_numpy=True).astype("float32")
+    _, ids = index.search(q, k)
+
+    hits, rr = 0, 0.0
+    for item, row in zip(eval_items, ids):
+        ranks = [rank for rank, i in enumerate(row, 1) if i >= 0 and is_hit(chunks[i], item)]
+        if ranks:
+            hits += 1
+            rr += 1.0 / ranks[0]
+
+    tokens = np.array([estimate_tokens(c["text"]) for c in chunks])
+    index_bytes = len(faiss.serialize_index(index)) + sum(len(c["text"].encode("utf-8")) for c in chunks)
+    return {
+        "chunker": name,
+        "chunks": len(chunks),
+        "mean_tokens": float(tokens.mean()),
+        "max_tokens": int(tokens.max()),
+        "truncated": int((tokens > EMBED_LIMIT).sum()),
+        "near_duplicates": near_duplicates(chunks),
+        "spanning": sum(c["page_end"] != c["page"] for c in chunks),
+        "index_mb": index_bytes / 1e6,
+        "embed_s": embed_s,
+        "hit_at_k": hits / len(eval_items),
+        "mrr": rr / len(eval_items),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--chunk-tokens", type=int, nargs="+", default=[MAX_TOKENS],
+                        help="token budgets to try for the semantic chunker")
+    parser.add_argument("--queries", help="JSON lines eval set (question, source, optional page / answer)")
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    eval_items = EVAL
+    if args.queries:
+        with open(args.queries) as f:
+            eval_items = [json.loads(line) for line in f if line.strip()]
+
+    # fixed windows read plain extraction, the semantic chunker needs real line breaks
+    plain = load_pages(lambda p: p.extract_text() or "")
+    lined = load_pages(page_text)
+    embedder = load_embedder(MODEL_NAME)
+
+    configs = {"fixed (800/150 chars)": (plain, lambda pages, pdf: fixed_chunks(pages, pdf))}
+    for budget in args.chunk_tokens:
+        configs[f"semantic ({budget} tokens)"] = (
+            lined, lambda pages, pdf, budget=budget: chunk_pages(pages, pdf, budget))
+
+    results = []
+    for name, (docs, chunk) in configs.items():
+        start = time.perf_counter()
+        chunks = [c for pdf, pages in docs.items() for c in chunk(pages, pdf)]
+        chunk_s = time.perf_counter() - start
+        stripped, lost = lost_words(lined, chunks) if docs is lined else (None, None)
+        results.append({**evaluate(name, chunks, embedder, eval_items, args.k), "chunk_s": chunk_s,
+                        "lost_headings": lost_headings(lined, chunks), "stripped_words": stripped,
+                        "lost_words": lost})
+
+    print(f"{len(lined)} PDFs, {len(eval_items)} eval questions, k={args.k}")
+    print(f"{'chunker':<24} {'chunks':>7} {'tokens':>7} {'max':>5} {'trunc':>6} {'near-dup':>9} "
+          f"{'span':>5} {'index MB':>9} {'embed s':>8} {'hit@k':>6} {'MRR':>6} {'lost hdr':>9} "
+          f"{'stripped':>9} {'lost words':>11}")
+    for r in results:
+        stripped, lost = ("-", "-") if r["lost_words"] is None else (r["stripped_words"], r["lost_words"])
+        print(f"{r['chunker']:<24} {r['chunks']:>7} {r['mean_tokens']:>7.1f} {r['max_tokens']:>5} "
+              f"{r['truncated']:>6} {r['near_duplicates']:>9} {r['spanning']:>5} {r['index_mb']:>9.3f} "
+              f"{r['embed_s']:>8.2f} {r['hit_at_k']:>6.2f} {r['mrr']:>6.3f} {r['lost_headings']:>9} "
+              f"{stripped:>9} {lost:>11}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"k": args.k, "eval_questions": len(eval_items), "results": results}, f, indent=2)
+
+    lost = [r["chunker"] for r in results if r["lost_words"] is not None and (r["lost_headings"] or r["lost_words"])]
+    if lost:
+        raise SystemExit(f"text missing from the chunks of: {', '.join(lost)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import time
+
+import numpy as np
+
+
+def time_calls(fn, inputs: list, repeat: int = 1) -> np.ndarray:
+    """
+    Call fn(x) for every x in inputs (repeat times) and return per-call latency in ms.
+    """
+    samples = []
+    for _ in range(repeat):
+        for x in inputs:
+            start = time.perf_counter()
+            fn(x)
+            samples.append((time.perf_counter() - start) * 1000)
+    return np.asarray(samples)
+
+
+def summarize(samples_ms: np.ndarray) -> dict:
+    return {
+        "n": int(samples_ms.size),
+        "mean_ms": float(samples_ms.mean()),
+        "p50_ms": float(np.percentile(samples_ms, 50)),
+        "p95_ms": float(np.percentile(samples_ms, 95)),
+        "p99_ms": float(np.percentile(samples_ms, 99)),
+    }
+
+
+def print_table(rows: dict[str, dict]):
+    print(f"{'case':<28} {'n':>7} {'mean':>10} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for name, s in rows.items():
+        print(
+            f"{name:<28} {s['n']:>7} {s['mean_ms']:>9.4f}ms {s['p50_ms']:>8.4f}ms "
+            f"{s['p95_ms']:>8.4f}ms {s['p99_ms']:>8.4f}ms"
+        )
@@ -0,0 +1,72 @@
+"""
+Embedding backends: drift vs the fp32 torch baseline and encode throughput.
+
+Drift check: the corpus index is built with the torch backend (as in
+production). For each backend, the same queries are embedded and searched
+against it; recall@k is the overlap with the torch-query results. Cosine
+similarity between backend and baseline vectors is reported too.
+
+Throughput: bulk encode of all indexed chunks (build time) and single-text
+encode latency (query time).
+
+Run from the repo root (ONNX backends need `pip install "sentence-transformers[onnx]"`):
+    python -m bench.embedder_backends --backends torch onnx onnx-int8
+"""
+import argparse
+import time
+
+import numpy as np
+import faiss
+
+from rag.embedders import BACKENDS, MODEL_NAME, load_embedder
+from rag.meta_store import MetaStore
+from bench.common import time_calls, summarize
+
+INDEX_DIR = "rag/index"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    texts = [m["text"] for m in MetaStore(INDEX_DIR).values()]
+    rng = np.random.default_rng(args.seed)
+    # pseudo-questions: the opening of randomly chosen chunks
+    queries = [texts[i][:200] for i in rng.choice(len(texts), size=min(args.queries, len(texts)), replace=False)]
+
+    baseline = load_embedder(MODEL_NAME, "torch")
+    corpus = baseline.encode(texts, convert_to_numpy=True).astype("float32")
+    index = faiss.IndexFlatL2(corpus.shape[1])
+    index.add(corpus)
+    base_q = baseline.encode(queries, convert_to_numpy=True).astype("float32")
+    _, truth = index.search(base_q, args.k)
+
+    print(f"{len(texts)} chunks | {len(queries)} queries | k={args.k}")
+    print(f"{'backend':<10} {'recall@k':>9} {'cos mean':>9} {'cos min':>9} "
+          f"{'bulk ch/s':>10} {'1-query p50':>12} {'p99':>9}")
+    for backend in args.backends:
+        embedder = baseline if backend == "torch" else load_embedder(MODEL_NAME, backend)
+
+        start = time.perf_counter()
+        bulk = embedder.encode(texts, convert_to_numpy=True).astype("float32")
+        bulk_rate = len(texts) / (time.perf_counter() - start)
+
+        q = embedder.encode(queries, convert_to_numpy=True).astype("float32")
+        _, found = index.search(q, args.k)
+        recall = sum(len(set(f) & set(t)) for f, t in zip(found, truth)) / truth.size
+
+        cos = (bulk * corpus).sum(axis=1) / (
+            np.linalg.norm(bulk, axis=1) * np.linalg.norm(corpus, axis=1)
+        )
+
+        single = summarize(time_calls(lambda t: embedder.encode([t], convert_to_numpy=True), queries))
+        print(f"{backend:<10} {recall:>9.3f} {cos.mean():>9.4f} {cos.min():>9.4f} "
+              f"{bulk_rate:>10.1f} {single['p50_ms']:>10.2f}ms {single['p99_ms']:>7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
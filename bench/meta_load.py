@@ -0,0 +1,89 @@
+"""
+Load time and per-process memory of the memory-mapped metadata store vs a pickled list of dicts.
+
+Each variant is loaded in a fresh subprocess (as a uvicorn worker would), then
+--lookups random ids are fetched. RssAnon is private to the process; RssFile
+is page cache that every worker mapping the same files shares.
+
+Run from the repo root (after python rag/build_index.py):
+    python -m bench.meta_load
+"""
+import argparse
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+
+from rag.meta_store import MetaStore
+
+INDEX_DIR = "rag/index"
+
+CHILD = r"""
+import json, pickle, random, sys, time
+
+def rss():
+    out = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(("VmRSS", "RssAnon", "RssFile")):
+                key, value = line.split(":")
+                out[key] = int(value.split()[0]) / 1024
+    return out
+
+kind, path, lookups = sys.argv[1], sys.argv[2], int(sys.argv[3])
+if kind == "store":
+    from rag.meta_store import MetaStore
+before = rss()
+start = time.perf_counter()
+if kind == "pickle":
+    with open(path, "rb") as f:
+        meta = pickle.load(f)
+else:
+    meta = MetaStore(path)
+load_ms = (time.perf_counter() - start) * 1000
+n = len(meta)
+start = time.perf_counter()
+for i in random.Random(0).choices(range(n), k=lookups):
+    meta[i]["text"]
+lookup_us = (time.perf_counter() - start) * 1e6 / max(lookups, 1)
+after = rss()
+print(json.dumps({
+    "load_ms": load_ms,
+    "lookup_us": lookup_us,
+    **{f"{k}_mb": after[k] - before[k] for k in after},
+}))
+"""
+
+
+def run(kind: str, path: str, lookups: int) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD, kind, path, str(lookups)],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    store = MetaStore(INDEX_DIR)
+    with tempfile.TemporaryDirectory() as tmp:
+        # the pre-store format: pickled list of {"text", "source", "page"} dicts
+        pkl_path = os.path.join(tmp, "docs_meta.pkl")
+        with open(pkl_path, "wb") as f:
+            pickle.dump(list(store.values()), f)
+
+        print(f"{len(store)} chunks | pickle {os.path.getsize(pkl_path) / 1e6:.2f} MB")
+        print(f"{'format':<8} {'load':>10} {'lookup':>10} {'dRSS':>9} {'dAnon':>9} {'dFile':>9}")
+        for kind, path in (("pickle", pkl_path), ("store", INDEX_DIR)):
+            r = run(kind, path, args.lookups)
+            print(f"{kind:<8} {r['load_ms']:>8.2f}ms {r['lookup_us']:>8.2f}us "
+                  f"{r['VmRSS_mb']:>7.2f}MB {r['RssAnon_mb']:>7.2f}MB {r['RssFile_mb']:>7.2f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Parity check + microbenchmark for the compiled single-row churn scorer.
+
+Run from the repo root:
+    python -m bench.predict_fastpath
+"""
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from ml.compiled_model import CompiledChurnModel
+from ml.utils import load_data, TARGET_COL
+from bench.common import time_calls, summarize, print_table
+
+MODEL_PATH = "models/churn_model.joblib"
+DATA_PATH = "data/churn_clean.csv"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000, help="customers used for parity + timing")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tol", type=float, default=1e-9, help="max allowed |proba diff|")
+    args = parser.parse_args()
+
+    model = joblib.load(MODEL_PATH)
+    compiled = CompiledChurnModel.from_pipeline(model)
+
+    df = load_data(DATA_PATH).drop(columns=[TARGET_COL]).head(args.rows)
+    customers = df.to_dict(orient="records")
+
+    # parity against the sklearn Pipeline
+    expected = model.predict_proba(df)[:, 1]
+    got = np.array([compiled.predict_proba_one(c) for c in customers])
+    max_diff = float(np.abs(expected - got).max())
+    print(f"Parity: {len(customers)} customers | max |diff| = {max_diff:.3e} (tol {args.tol:.0e})")
+    if max_diff > args.tol:
+        raise SystemExit("Parity check FAILED")
+
+    # per-call latency, one customer per call (what /predict does); a one-row frame with a missing
+    # category gets a float column the fitted encoder cannot compare, so those rows are only used for parity
+    timed = [c for c, complete in zip(customers, df.notna().all(axis=1)) if complete]
+    rows = {
+        "pipeline (DataFrame)": summarize(
+            time_calls(lambda c: model.predict_proba(pd.DataFrame([c]))[0][1], timed, args.repeat)
+        ),
+        "compiled (dot + lookup)": summarize(
+            time_calls(compiled.predict_proba_one, timed, args.repeat)
+        ),
+    }
+    print(f"Latency: {len(timed)} customers without missing values")
+    print_table(rows)
+    speedup = rows["pipeline (DataFrame)"]["p50_ms"] / rows["compiled (dot + lookup)"]["p50_ms"]
+    print(f"p50 speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
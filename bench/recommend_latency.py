@@ -0,0 +1,92 @@
+"""
+/recommend latency: the recommendation path before precomputation vs precomputed per-tier payloads.
+
+  before   what recommend_service did per call before per-tier payloads (copied below): encode the
+           tier query, FAISS search top 8, keep RetentionPolicy.pdf hits, keyword scan, legacy
+           action parsing and formatting
+  after    services.recommend_service: model scoring + the payload precomputed at index load
+
+Both score the customer with services.predict_service, so the difference is the recommendation part.
+
+Run from the repo root:
+    python -m bench.recommend_latency
+"""
+import argparse
+
+from api import services
+from ml.utils import load_data, TARGET_COL
+from bench.action_parser import legacy_format, legacy_parse
+from bench.common import time_calls, summarize, print_table
+
+DATA_PATH = "data/churn_clean.csv"
+
+KEYWORDS = [
+    "Recommended actions", "RET10", "RET5", "Plan Upgrade", "Premium Support",
+    "Contract Lock-in", "Escalation", "within 24 hours", "within 12 hours", "discount",
+]
+
+
+def recommend_uncached(customer: dict) -> dict:
+    pred_out = services.predict_service(customer)
+    risk = pred_out["risk"]
+    embedder = services._registry.get("embedder")
+    bundle = services._registry.get("index")
+
+    # ask_service(query, top_k=8): encode + exact search + metadata, no query cache
+    q_emb = embedder.encode([services.RISK_QUERIES[risk]], convert_to_numpy=True).astype("float32")
+    distances, ids = bundle.index.search(q_emb, 8)
+    results = []
+    for idx, dist in zip(ids[0], distances[0]):
+        if idx >= 0:
+            chunk = bundle.meta[idx]
+            results.append({"text": chunk["text"], "source": chunk["source"], "page": chunk["page"],
+                            "distance": float(dist)})
+
+    results = [r for r in results if r["source"] == "RetentionPolicy.pdf"]
+    if not results:
+        return {**pred_out, "recommended_text": "No retention policy evidence found in indexed documents.",
+                "sources": []}
+
+    action_chunk = results[0]
+    for r in results:
+        t = r["text"].lower()
+        if any(k.lower() in t for k in KEYWORDS):
+            action_chunk = r
+            break
+
+    actions = [] if risk == "low" else legacy_parse(action_chunk["text"])
+    sources, seen = [], set()
+    for r in results[:6]:
+        key = (r["source"], r["page"])
+        if key not in seen:
+            seen.add(key)
+            sources.append(f"{r['source']} (page {r['page']})")
+    return {
+        **pred_out,
+        "message": services.RISK_MESSAGES[risk],
+        "recommended_text": legacy_format(action_chunk["text"])[:2500],
+        "sources": sources,
+        "actions": actions,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = load_data(DATA_PATH).drop(columns=[TARGET_COL]).head(args.rows)
+    customers = df.to_dict(orient="records")
+
+    rows = {
+        "before (build per call)": summarize(time_calls(recommend_uncached, customers, args.repeat)),
+        "after (precomputed tier)": summarize(time_calls(services.recommend_service, customers, args.repeat)),
+    }
+    print_table(rows)
+    for q in ("p50_ms", "p99_ms"):
+        print(f"{q[:3]} speedup: {rows['before (build per call)'][q] / rows['after (precomputed tier)'][q]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Latency / throughput harness for the service layer and the HTTP API.
+
+Scenarios (each run with --concurrency client threads for --requests calls):
+  service:predict / service:ask / service:recommend  -> api.services functions
+  http:/predict / http:/ask / http:/recommend        -> FastAPI app via an in-process TestClient
+Per-stage timings (embed, search, lexical, meta, score, parse) call each stage on its own,
+sequentially, so they show where a request spends its time.
+
+Results (p50/p95/p99, requests/sec, stages, config, git commit) are written as
+JSON; --compare prints the change against an earlier results file.
+
+Run from the repo root (after training the model and building the index):
+    API_KEY=... python -m bench.run --concurrency 1 8 --out bench_results.json
+    API_KEY=... python -m bench.run --compare bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+import numpy as np
+
+from api import services
+from api.config import API_KEY
+from rag.action_parser import parse_chunk
+from ml.utils import load_data, TARGET_COL
+from bench.common import time_calls, summarize
+
+DATA_PATH = "data/churn_clean.csv"
+
+QUESTIONS = [
+    "What is the refund timeline?",
+    "How do I cancel my contract early?",
+    "Which discounts are available for long-term customers?",
+    "What happens if a payment is late?",
+    "Can I upgrade my internet plan mid-contract?",
+    "What retention offers exist for high-risk customers?",
+    "How are device protection claims handled?",
+    "What is the policy for service outages?",
+]
+
+
+def load_customers(n: int) -> list[dict]:
+    df = load_data(DATA_PATH).drop(columns=[TARGET_COL]).head(n)
+    # missing values (e.g. "None" in the CSV) as null: NaN is not valid JSON for the http scenarios
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def make_questions(n: int, distinct: bool) -> list[str]:
+    # distinct=True defeats the query embedding cache so every call pays for encoding
+    return [QUESTIONS[i % len(QUESTIONS)] + (f" (#{i})" if distinct else "") for i in range(n)]
+
+
+def run_concurrent(fn, inputs: list, concurrency: int) -> dict:
+    """
+    Call fn(x) for every input from `concurrency` threads; latency per call + overall requests/sec.
+    """
+    def timed(x):
+        start = time.perf_counter()
+        fn(x)
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = np.fromiter(pool.map(timed, inputs), dtype=float, count=len(inputs))
+    wall = time.perf_counter() - start
+    return {**summarize(samples), "rps": len(inputs) / wall, "concurrency": concurrency}
+
+
+def http_scenarios(client, customers: list[dict], questions: list[str]) -> dict:
+    headers = {"X-API-Key": API_KEY}
+
+    def post(path):
+        def call(body):
+            resp = client.post(path, json=body, headers=headers)
+            if resp.status_code != 200 or "error" in resp.json():
+                raise RuntimeError(f"{path} -> {resp.status_code}: {resp.text[:200]}")
+        return call
+
+    return {
+        "http:/predict": (post("/predict"), customers),
+        "http:/ask": (post("/ask"), [{"question": q, "top_k": 5} for q in questions]),
+        "http:/recommend": (post("/recommend"), customers),
+    }
+
+
+def service_scenarios(customers: list[dict], questions: list[str]) -> dict:
+    return {
+        "service:predict": (services.predict_service, customers),
+        "service:ask": (services.ask_service, questions),
+        "service:recommend": (services.recommend_service, customers),
+    }
+
+
+def stage_breakdown(customers: list[dict], questions: list[str], repeat: int) -> dict:
+    """
+    Time each stage of the request path in isolation (no caches, no pools).
+    """
+    embedder = services._registry.get("embedder")
+    bundle = services._registry.get("index")
+
+    def embed(q):
+        return embedder.encode([q], convert_to_numpy=True).astype("float32")
+
+    q_embs = [embed(q) for q in questions]
+    hit_ids = [bundle.index.search(e, 5)[1][0] for e in q_embs]
+    texts = [bundle.meta[i]["text"] for ids in hit_ids for i in ids if i >= 0]
+
+    stages = {
+        "embed": (embed, questions),
+        "search": (lambda e: bundle.index.search(e, 5), q_embs),
+        "lexical": (lambda q: bundle.lexical.search(q, 20), questions if bundle.lexical is not None else []),
+        "meta": (lambda ids: [bundle.meta[i] for i in ids if i >= 0], hit_ids),
+        "score": (services.predict_service, customers),
+        "parse": (parse_chunk, texts),
+    }
+    return {name: summarize(time_calls(fn, inputs, repeat)) for name, (fn, inputs) in stages.items() if inputs}
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: dict, baseline: dict | None = None):
+    print(f"{'scenario':<22} {'conc':>5} {'p50':>10} {'p95':>10} {'p99':>10} {'req/s':>9}")
+    for key, r in results.items():
+        line = (f"{key:<22} {r.get('concurrency', 1):>5} {r['p50_ms']:>8.2f}ms "
+                f"{r['p95_ms']:>8.2f}ms {r['p99_ms']:>8.2f}ms {r.get('rps', 0):>9.1f}")
+        if baseline and key in baseline:
+            b = baseline[key]
+            line += f"   p50 {100 * (r['p50_ms'] / b['p50_ms'] - 1):+.1f}%  p99 {100 * (r['p99_ms'] / b['p99_ms'] - 1):+.1f}%"
+            if "rps" in r and b.get("rps"):
+                line += f"  req/s {100 * (r['rps'] / b['rps'] - 1):+.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="calls per scenario and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--only", nargs="+", choices=("service", "http", "stages"),
+                        default=["service", "http", "stages"])
+    parser.add_argument("--distinct-questions", action="store_true", help="unique questions (no embedding cache hits)")
+    parser.add_argument("--stage-repeat", type=int, default=3)
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to diff against")
+    args = parser.parse_args()
+
+    customers = load_customers(args.requests)
+    customers = (customers * (args.requests // max(len(customers), 1) + 1))[:args.requests]
+    questions = make_questions(args.requests, args.distinct_questions)
+
+    services.load_resources()
+
+    scenarios = {}
+    if "service" in args.only:
+        scenarios.update(service_scenarios(customers, questions))
+
+    results = {}
+    with ExitStack() as stack:
+        if "http" in args.only:
+            from fastapi.testclient import TestClient
+            from api.main import app
+
+            # entering the client runs the app's startup/shutdown events
+            client = stack.enter_context(TestClient(app))
+            scenarios.update(http_scenarios(client, customers, questions))
+
+        for name, (fn, inputs) in scenarios.items():
+            for concurrency in args.concurrency:
+                results[f"{name}@{concurrency}"] = run_concurrent(fn, inputs, concurrency)
+
+    stages = stage_breakdown(customers, questions, args.stage_repeat) if "stages" in args.only else {}
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"comparing against {args.compare} (commit {baseline.get('commit')})")
+
+    print_results(results, baseline and baseline.get("results"))
+    if stages:
+        print()
+        print_results({f"stage:{k}": v for k, v in stages.items()},
+                      baseline and {f"stage:{k}": v for k, v in baseline.get("stages", {}).items()})
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"python": platform.python_version(), "machine": platform.machine(), "cpus": os.cpu_count()},
+        "config": vars(args),
+        **services.current_versions(),
+        "results": results,
+        "stages": stages,
+    }
+    if args.out and args.out != args.compare:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
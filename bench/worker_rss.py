@@ -0,0 +1,148 @@
+"""
+Total memory of N API worker processes: per-worker loading vs shared (mmap + pre-fork) mode.
+
+For every worker count the server is started, polled until /health/ready
+answers, sent --requests /ask and /predict calls (so the pages the workers
+actually use are touched), and then measured from /proc/<pid>/smaps_rollup
+for the master and all of its workers:
+  RSS = resident pages, counting shared pages once per process (overstates the total)
+  PSS = shared pages split between the processes mapping them (sums to real usage)
+
+Modes:
+  baseline = uvicorn --workers N, each worker loads its own copy
+  shared   = gunicorn --preload with INDEX_MMAP=1 and PRELOAD_RESOURCES=1
+
+Linux only; the shared mode needs gunicorn installed. Run from the repo root:
+    API_KEY=... python -m bench.worker_rss --workers 1 4 8
+"""
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+from ml.utils import load_data, TARGET_COL
+
+DATA_PATH = "data/churn_clean.csv"
+
+
+def command(mode: str, workers: int, port: int) -> list[str]:
+    if mode == "baseline":
+        return [sys.executable, "-m", "uvicorn", "api.main:app",
+                "--port", str(port), "--workers", str(workers)]
+    return [sys.executable, "-m", "gunicorn", "api.main:app", "--preload",
+            "-k", "uvicorn.workers.UvicornWorker", "-w", str(workers), "-b", f"127.0.0.1:{port}"]
+
+
+def environment(mode: str) -> dict:
+    env = dict(os.environ, STARTUP_LOAD="eager")
+    if mode == "shared":
+        env.update(INDEX_MMAP="1", PRELOAD_RESOURCES="1")
+    return env
+
+
+def request(url: str, body: dict | None = None) -> int:
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={
+        "Content-Type": "application/json", "X-API-Key": os.getenv("API_KEY", ""),
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=30) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def wait_ready(base: str, workers: int, timeout: float):
+    # requests land on arbitrary workers: require a run of successes before trusting it
+    deadline, streak = time.monotonic() + timeout, 0
+    while streak < workers * 4:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"server at {base} not ready after {timeout}s")
+        streak = streak + 1 if request(f"{base}/health/ready") == 200 else 0
+        if not streak:
+            time.sleep(0.5)
+
+
+def process_tree(pid: int) -> list[int]:
+    pids, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        pids.append(p)
+        try:
+            with open(f"/proc/{p}/task/{p}/children") as f:
+                todo.extend(int(c) for c in f.read().split())
+        except FileNotFoundError:
+            pass
+    return pids
+
+
+def memory_mb(pid: int) -> dict:
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                out[key] = int(rest.split()[0]) / 1024
+    return out
+
+
+def measure(mode: str, workers: int, port: int, requests: int, timeout: float) -> dict:
+    base = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen(command(mode, workers, port), env=environment(mode),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(base, workers, timeout)
+        customer = load_data(DATA_PATH).drop(columns=[TARGET_COL]).iloc[0].to_dict()
+        for i in range(requests):
+            request(f"{base}/ask", {"question": f"refund timeline {i}", "top_k": 5})
+            request(f"{base}/predict", customer)
+        # the uvicorn supervisor / gunicorn arbiter is the tree root
+        pids = process_tree(proc.pid)
+        mem = [memory_mb(p) for p in pids]
+        return {
+            "processes": len(pids),
+            "rss_mb": sum(m["Rss"] for m in mem),
+            "pss_mb": sum(m["Pss"] for m in mem),
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--modes", nargs="+", choices=("baseline", "shared"), default=["baseline", "shared"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=50, help="/ask + /predict calls before measuring")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for readiness")
+    parser.add_argument("--out", help="also write the results as JSON to this path")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'mode':<9} {'workers':>7} {'procs':>6} {'RSS total':>11} {'PSS total':>11} {'PSS/worker':>11}")
+    for mode in args.modes:
+        for workers in args.workers:
+            r = {"mode": mode, "workers": workers,
+                 **measure(mode, workers, args.port, args.requests, args.timeout)}
+            results.append(r)
+            print(f"{mode:<9} {workers:>7} {r['processes']:>6} {r['rss_mb']:>9.1f}MB "
+                  f"{r['pss_mb']:>9.1f}MB {r['pss_mb'] / workers:>9.1f}MB")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
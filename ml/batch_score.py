@@ -0,0 +1,184 @@
+"""
+Offline churn scoring of a large CSV / Parquet file of customers.
+
+The input is streamed in chunks, each chunk is scored with the saved pipeline
+in a process pool, and results are written in input order as they complete:
+  output .csv     -> one CSV file, appended per chunk
+  output .parquet -> a directory of part-NNNNN.parquet files
+
+After every written chunk a checkpoint (<output>.checkpoint.json) records the
+next chunk, so an interrupted run continues where it stopped when started
+again with the same arguments.
+
+    python ml/batch_score.py data/churn_clean.csv scores.csv --keep "Customer ID"
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from utils import drop_leakage_cols, TARGET_COL
+
+MODEL_PATH = "models/churn_model.joblib"
+
+# set in each worker process by _init_worker
+_model = None
+
+
+def _init_worker(model_path: str):
+    global _model
+    _model = joblib.load(model_path)
+
+
+def _score_chunk(df: pd.DataFrame, keep: list[str]) -> pd.DataFrame:
+    # same column handling as training: leakage cols and the label never reach the model
+    X = drop_leakage_cols(df).drop(columns=[TARGET_COL], errors="ignore")
+    features = getattr(_model, "feature_names_in_", None)
+    if features is not None:
+        X = X[list(features)]
+    proba = _model.predict_proba(X)[:, 1]
+
+    out = df[keep].reset_index(drop=True) if keep else pd.DataFrame(index=range(len(df)))
+    out["churn_prediction"] = (proba >= 0.5).astype(np.int8)
+    out["churn_probability"] = np.round(proba, 4)
+    out["risk"] = np.select([proba >= 0.7, proba >= 0.5], ["high", "medium"], default="low")
+    return out
+
+
+def iter_chunks(path: str, chunksize: int):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+class OutputWriter:
+    """
+    Appends scored chunks to the output. position() is stored in the checkpoint
+    so a resumed run can drop anything written after the last checkpoint.
+    """
+
+    def __init__(self, path: str, resume_from: int | None):
+        self.path = path
+        self.parquet = path.endswith(".parquet")
+        if self.parquet:
+            os.makedirs(path, exist_ok=True)
+            self._parts = resume_from or 0
+            # parts past the checkpoint were written by the interrupted run
+            for name in os.listdir(path):
+                if name.startswith("part-") and int(name[5:10]) >= self._parts:
+                    os.remove(os.path.join(path, name))
+        else:
+            if resume_from is None:
+                open(path, "w").close()
+            else:
+                with open(path, "r+b") as f:
+                    f.truncate(resume_from)
+
+    def write(self, df: pd.DataFrame):
+        if self.parquet:
+            df.to_parquet(os.path.join(self.path, f"part-{self._parts:05d}.parquet"), index=False)
+            self._parts += 1
+        else:
+            with open(self.path, "a", newline="") as f:
+                df.to_csv(f, header=f.tell() == 0, index=False)
+
+    def position(self) -> int:
+        return self._parts if self.parquet else os.path.getsize(self.path)
+
+
+def _input_signature(path: str, chunksize: int) -> dict:
+    st = os.stat(path)
+    return {"input": os.path.abspath(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns, "chunksize": chunksize}
+
+
+def load_checkpoint(path: str, signature: dict) -> dict | None:
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    if {k: checkpoint.get(k) for k in signature} != signature:
+        raise SystemExit(
+            f"Checkpoint {path} belongs to a different input or chunksize; "
+            "delete it or pass --restart"
+        )
+    return checkpoint
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, path)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="customers .csv or .parquet")
+    parser.add_argument("output", help="scores .csv, or .parquet (written as a directory of parts)")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--chunksize", type=int, default=50_000, help="rows per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--keep", nargs="*", default=[], help="input columns copied to the output (e.g. an id)")
+    parser.add_argument("--checkpoint", help="default: <output>.checkpoint.json")
+    parser.add_argument("--restart", action="store_true", help="ignore an existing checkpoint")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    checkpoint_path = args.checkpoint or args.output.rstrip("/") + ".checkpoint.json"
+    signature = _input_signature(args.input, args.chunksize)
+
+    checkpoint = None if args.restart else load_checkpoint(checkpoint_path, signature)
+    start_chunk = checkpoint["next_chunk"] if checkpoint else 0
+    rows_done = checkpoint["rows_done"] if checkpoint else 0
+    writer = OutputWriter(args.output, checkpoint["output_position"] if checkpoint else None)
+    if checkpoint:
+        print(f"Resuming at chunk {start_chunk} ({rows_done} rows already scored)")
+
+    start, rows_run = time.perf_counter(), 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(args.model,)) as pool:
+        # keep a bounded number of chunks in flight and write them back in input order
+        pending = []
+
+        def drain_one():
+            nonlocal rows_done, rows_run
+            chunk_no, future = pending.pop(0)
+            scored = future.result()
+            writer.write(scored)
+            rows_done += len(scored)
+            rows_run += len(scored)
+            save_checkpoint(checkpoint_path, {
+                **signature,
+                "next_chunk": chunk_no + 1,
+                "rows_done": rows_done,
+                "output_position": writer.position(),
+            })
+            elapsed = time.perf_counter() - start
+            print(f"chunk {chunk_no}: {rows_done} rows | {rows_run / elapsed:,.0f} rows/sec")
+
+        for chunk_no, df in enumerate(iter_chunks(args.input, args.chunksize)):
+            if chunk_no < start_chunk:
+                continue
+            pending.append((chunk_no, pool.submit(_score_chunk, df, args.keep)))
+            if len(pending) >= args.workers * 2:
+                drain_one()
+        while pending:
+            drain_one()
+
+    elapsed = time.perf_counter() - start
+    print(f"Scored {rows_run} rows in {elapsed:.1f}s ({rows_run / max(elapsed, 1e-9):,.0f} rows/sec) "
+          f"-> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import math
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+# table key of the missing-value category: NaN != NaN, so NaN itself cannot be looked up in a dict
+_MISSING = object()
+
+
+def _category_key(value):
+    # None and NaN both select the encoder's missing-value category (as in OneHotEncoder)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return _MISSING
+    return value
+
+
+class CompiledChurnModel:
+    """
+    Single-row scorer compiled from the saved churn Pipeline
+    (ColumnTransformer[StandardScaler, OneHotEncoder] -> LogisticRegression).
+
+    The scaler is folded into the numeric coefficients and each one-hot
+    column becomes a {category: weight} lookup table, so scoring a customer
+    dict is one dot product plus a few dict lookups (no pandas, no sklearn).
+    """
+
+    def __init__(self, num_cols: list[str], num_coef: np.ndarray, cat_tables: dict[str, dict], intercept: float):
+        self.num_cols = num_cols
+        self.num_coef = num_coef
+        self.cat_tables = cat_tables
+        self.intercept = intercept
+
+    @classmethod
+    def from_pipeline(cls, pipe: Pipeline) -> "CompiledChurnModel":
+        """
+        Extract scaler stats, category vocabularies and coefficients.
+        Raises ValueError if the pipeline shape is not supported.
+        """
+        pre = pipe.named_steps.get("pre")
+        clf = pipe.named_steps.get("model")
+        if pre is None or clf is None or not hasattr(clf, "coef_"):
+            raise ValueError("Expected Pipeline([('pre', ColumnTransformer), ('model', LogisticRegression)])")
+        if clf.coef_.shape[0] != 1:
+            raise ValueError("Only binary logistic regression is supported")
+
+        coef = clf.coef_[0]
+        intercept = float(clf.intercept_[0])
+        num_cols, num_coef, cat_tables = [], [], {}
+
+        for name, trans, cols in pre.transformers_:
+            if trans == "drop":
+                continue
+            if name == "remainder":
+                if len(cols):
+                    raise ValueError("remainder='passthrough' is not supported")
+                continue
+
+            # ("num", Pipeline([("scaler", StandardScaler())]), cols)
+            if isinstance(trans, Pipeline):
+                if len(trans.steps) != 1:
+                    raise ValueError(f"Transformer '{name}' has more than one step")
+                trans = trans.steps[0][1]
+
+            weights = coef[pre.output_indices_[name]]
+
+            if isinstance(trans, StandardScaler):
+                mean = trans.mean_ if trans.with_mean else np.zeros(len(cols))
+                scale = trans.scale_ if trans.with_std else np.ones(len(cols))
+                w = weights / scale
+                intercept -= float(np.dot(w, mean))
+                num_cols.extend(cols)
+                num_coef.extend(w.tolist())
+
+            elif isinstance(trans, OneHotEncoder):
+                if trans.handle_unknown != "ignore" or trans.drop_idx_ is not None:
+                    raise ValueError("OneHotEncoder must use handle_unknown='ignore' and no drop")
+                if getattr(trans, "min_frequency", None) is not None or getattr(trans, "max_categories", None) is not None:
+                    raise ValueError("Infrequent category grouping is not supported")
+                pos = 0
+                for col, cats in zip(cols, trans.categories_):
+                    if sum(_category_key(cat) is _MISSING for cat in cats) > 1:
+                        # fitted on both None and NaN, which the encoder keeps apart
+                        raise ValueError(f"Column '{col}' has more than one missing-value category")
+                    # unknown categories encode to all zeros -> weight 0
+                    cat_tables[col] = {_category_key(cat): float(weights[pos + j]) for j, cat in enumerate(cats)}
+                    pos += len(cats)
+
+            else:
+                raise ValueError(f"Unsupported transformer '{name}': {type(trans).__name__}")
+
+        return cls(num_cols, np.asarray(num_coef, dtype=np.float64), cat_tables, intercept)
+
+    def decision_function_one(self, customer: dict) -> float:
+        """
+        Raises ValueError for a missing or non-finite numeric value, like the Pipeline's scaler.
+        """
+        x = np.fromiter((customer[c] for c in self.num_cols), dtype=np.float64, count=len(self.num_cols))
+        # fromiter turns None into NaN
+        if not np.isfinite(x).all():
+            bad = [c for c, v in zip(self.num_cols, x) if not math.isfinite(v)]
+            raise ValueError(f"Input contains NaN or infinity in numeric columns: {bad}")
+        z = self.intercept + float(np.dot(self.num_coef, x))
+        for col, table in self.cat_tables.items():
+            z += table.get(_category_key(customer[col]), 0.0)
+        return z
+
+    def predict_proba_one(self, customer: dict) -> float:
+        """
+        Probability of churn = 1 for a single customer dict.
+        """
+        z = self.decision_function_one(customer)
+        # numerically stable sigmoid
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
@@ -11,15 +11,17 @@ DROP_COLS = [
 TARGET_COL = "Churn Label"
 
 
+def drop_leakage_cols(df: pd.DataFrame) -> pd.DataFrame:
+    # drop leakage/risky cols
+    drop_cols = [c for c in DROP_COLS if c in df.columns]
+    return df.drop(columns=drop_cols)
+
+
 def load_data(path: str = "data/churn_clean.csv") -> pd.DataFrame:
     df = pd.read_csv(path)
 
     # encode target
     df[TARGET_COL] = df[TARGET_COL].map({"No": 0, "Yes": 1})
 
-    # drop leakage/risky cols
-    drop_cols = [c for c in DROP_COLS if c in df.columns]
-    df = df.drop(columns=drop_cols)
-
-    return df
+    return drop_leakage_cols(df)
 
@@ -1,89 +1,126 @@
 import re
-from typing import List, Dict
+import threading
+from collections import OrderedDict
+from typing import List, Dict, NamedTuple
 
+# compiled once; the parser runs on every policy chunk picked for a recommendation
+_MARKER_RE = re.compile(r"recommended actions:", re.IGNORECASE)
+# numbered action: "1. ", "2. ", ...
+_ITEM_RE = re.compile(r"\d\.\s")
+# display: numbered items and ○ bullets start a new line
+_DISPLAY_RE = re.compile(r"[1-6]\.|○")
+_ELIGIBILITY = "Eligibility:"
 
-def clean_text(t: str) -> str:
-    # normalize whitespace and weird bullets
-    t = t.replace("○", "-")
-    t = " ".join(t.split())
-    return t
 
+class ParsedChunk(NamedTuple):
+    # [{"title", "details", "eligibility"}, ...]
+    actions: List[Dict[str, str]]
+    # text after "Recommended actions:" with one numbered item / bullet per line (not truncated)
+    display: str
 
-def parse_policy_actions(policy_chunk: str) -> List[Dict[str, str]]:
-    """
-    Extract structured actions from RetentionPolicy chunk text.
 
-    Output format:
-    [
-      {"title": "...", "details": "...", "eligibility": "..."},
-      ...
-    ]
-    """
-    if not policy_chunk:
-        return []
+def clean_text(t: str) -> str:
+    # normalize whitespace and weird bullets
+    return " ".join(t.replace("○", "-").split())
 
-    text = clean_text(policy_chunk)
 
-    # focus after "Recommended actions" if available
-    marker = "Recommended actions:"
-    if marker.lower() in text.lower():
-        idx = text.lower().find(marker.lower())
-        text = text[idx + len(marker):].strip()
+def _display_break(m: re.Match) -> str:
+    return "\n  -" if m.group() == "○" else "\n" + m.group()
 
-    # split by numbered actions: "1.", "2.", ...
-    # keep the number markers by using regex split
-    parts = re.split(r"(\d\.\s)", text)
 
-    actions = []
-    current_num = None
-    buffer = ""
+def _action(buf: str) -> Dict[str, str] | None:
+    buf = buf.strip()
+    if not buf:
+        return None
+    details, found, eligibility = buf.partition(_ELIGIBILITY)
+    if found:
+        details = details.strip(" -")
+        eligibility = eligibility.strip()
+    else:
+        details = buf
+    if not details:
+        return None
 
-    def flush_action(buf: str):
-        buf = buf.strip()
-        if not buf:
-            return
+    # title: text up to the first "-", or the first 10 words if that is too short
+    title = details.partition("-")[0].strip()
+    if len(title) < 10:
+        title = " ".join(details.split(None, 10)[:10])
+    return {"title": title, "details": details, "eligibility": eligibility}
 
-        title = buf
-        eligibility = ""
-        details = buf
 
-        # Separate eligibility
-        if "Eligibility:" in buf:
-            details, eligibility = buf.split("Eligibility:", 1)
-            details = details.strip(" -")
-            eligibility = eligibility.strip()
+def parse_chunk(policy_chunk: str) -> ParsedChunk:
+    """
+    Parse a RetentionPolicy chunk in one pass over the normalized text:
+    the part after "Recommended actions:" (if present) is split into numbered
+    actions with their eligibility, and laid out for display.
+    """
+    if not policy_chunk:
+        return ParsedChunk([], "")
 
-        # Determine title from details
-        # Better title extraction (first 6-10 words)
-        title_candidate = details.split("-")[0].strip()
-        title_candidate = re.sub(r"\s+", " ", title_candidate)
+    # "○" is not whitespace, so normalizing before replacing bullets gives the same text
+    text = " ".join(policy_chunk.split())
+    m = _MARKER_RE.search(text)
+    if m:
+        text = text[m.end():].strip()
 
-        # If title is too short or truncated, fallback to first 10 words
-        if len(title_candidate) < 10:
-            title_candidate = " ".join(details.split()[:10])
+    actions = []
+    # text before "1. " and between the numbered markers, one action each
+    for part in _ITEM_RE.split(text.replace("○", "-")):
+        action = _action(part)
+        if action is not None:
+            actions.append(action)
+    return ParsedChunk(actions, _DISPLAY_RE.sub(_display_break, text))
 
-        title = title_candidate.strip()
 
-        actions.append({
-            "title": title.strip(),
-            "details": details.strip(),
-            "eligibility": eligibility.strip()
-        })
+def parse_policy_actions(policy_chunk: str) -> List[Dict[str, str]]:
+    """
+    Extract structured actions from RetentionPolicy chunk text.
+
+    Output format:
+    [
+      {"title": "...", "details": "...", "eligibility": "..."},
+      ...
+    ]
+    """
+    return parse_chunk(policy_chunk).actions
 
-    # rebuild based on split tokens
-    for p in parts:
-        if re.fullmatch(r"\d\.\s", p or ""):
-            # flush previous
-            flush_action(buffer)
-            buffer = ""
-            current_num = p.strip()
-        else:
-            buffer += " " + (p or "")
 
-    flush_action(buffer)
+def format_actions(policy_chunk: str, limit: int = 1600) -> str:
+    """
+    Policy chunk as a readable action list (numbered items / bullets on their own line).
+    """
+    return parse_chunk(policy_chunk).display[:limit]
 
-    # post-clean: remove empty actions
-    actions = [a for a in actions if a["details"]]
 
-    return actions
+class ActionCache:
+    """
+    Bounded, thread-safe LRU of parsed chunks by chunk id.
+    Chunk ids are only unique within one index build, so keep one cache per loaded index.
+    Cached results are shared: callers must not modify them.
+    """
 
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._data: OrderedDict[int, ParsedChunk] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chunk_id: int, text: str) -> ParsedChunk:
+        with self._lock:
+            parsed = self._data.get(chunk_id)
+            if parsed is not None:
+                self._data.move_to_end(chunk_id)
+                self.hits += 1
+                return parsed
+            self.misses += 1
+        parsed = parse_chunk(text)
+        with self._lock:
+            self._data[chunk_id] = parsed
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+        return parsed
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"size": len(self._data), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
@@ -1,24 +1,24 @@
 #importing all the libraries
-import pickle
 import numpy as np
-import faiss
-from sentence_transformers import SentenceTransformer
+
+from embedders import load_embedder
+from index_factory import read_index
+from meta_store import MetaStore, page_label
 
 
 INDEX_DIR = "rag/index"
 MODEL_NAME = "all-MiniLM-L6-v2"
 
 def load_index():
-    index = faiss.read_index(f"{INDEX_DIR}/docs.index")
-    with open(f"{INDEX_DIR}/docs_meta.pkl","rb") as f:
-        meta = pickle.load(f)
+    index = read_index(INDEX_DIR)
+    meta = MetaStore(INDEX_DIR)
     return index, meta
 
 
 def search(query: str, top_k: int = 5):
     #load components
     index, meta = load_index()
-    embedder = SentenceTransformer(MODEL_NAME)
+    embedder = load_embedder(MODEL_NAME)
 
     #embed query
     q_emb = embedder.encode([query], convert_to_numpy=True).astype("float32")
@@ -28,11 +28,14 @@ def search(query: str, top_k: int = 5):
 
     results = []
     for idx, dist in zip(ids[0], distances[0]):
+        if idx < 0:
+            continue
         chunk = meta[idx]
         results.append({
             "text":chunk["text"],
             "source": chunk["source"],
             "page": chunk["page"],
+            "page_end": chunk["page_end"],
             "distance": float(dist)
         })
     return results
@@ -50,7 +53,7 @@ def main():
     print("\nTop retrieved chunks:\n")
     for i, r in enumerate(results,1):
         print(f"--- Result {i} ---")
-        print(f"Source: {r['source']} | Page: {r['page']} | Distance: {r['distance']:.4f}")
+        print(f"Source: {r['source']} | {page_label(r).capitalize()} | Distance: {r['distance']:.4f}")
         print(r["text"][:700])
         print()
 
@@ -1,25 +1,50 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import hashlib
+import json
 import os
 from pathlib import Path
-import pickle
+import resource
+import time
 
 import numpy as np
 from pypdf import PdfReader
 from sentence_transformers import SentenceTransformer
 import faiss
 
+from index_factory import (
+    INDEX_TYPES,
+    StreamingIndexBuilder,
+    load_index_config,
+    save_index_config,
+    supports_remove,
+)
+from meta_store import MetaStore, MetaStoreWriter, store_exists
+from embedders import BACKENDS, EMBED_BACKEND, load_embedder
+from lexical import build_lexical_index, lexical_exists
+from chunker import MAX_TOKENS, chunk_pages, page_text
+from embed_store import DEFAULT_DIR as EMBED_CACHE_DIR, DEFAULT_MAX_MB as EMBED_CACHE_MB, EmbeddingStore
+
 DOCS_DIR = "docs"
 INDEX_DIR = "rag/index"
 MODEL_NAME = "all-MiniLM-L6-v2"
 
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 150
+# fixed = CHUNK_SIZE-character windows per page; semantic = rag/chunker.py
+CHUNKERS = ("fixed", "semantic")
+
+MANIFEST_FILE = "manifest.json"
 
 
-def extract_text_from_pdf(pdf_path: str)-> list[dict]:
+def extract_text_from_pdf(pdf_path: str, start: int = 0, end: int | None = None,
+                          lines: bool = False)-> list[dict]:
+    # lines=True: keep real line breaks (see chunker.page_text), which the semantic chunker relies on
     reader = PdfReader(pdf_path)
     pages = []
-    for i, page in enumerate(reader.pages):
-        text = page.extract_text() or ""
+    for i in range(start, len(reader.pages) if end is None else min(end, len(reader.pages))):
+        text = page_text(reader.pages[i]) if lines else reader.pages[i].extract_text() or ""
         pages.append({"page_num": i+1, "text":text})
     return pages
 
@@ -37,45 +62,355 @@ def chunk_text(text: str, chunk_size: int = CHUNK_SIZE, overlap: int = CHUNK_OVE
             start = 0;
     return chunks
 
-def main():
-    Path(INDEX_DIR).mkdir(parents=True, exist_ok=True)
+def extract_unit(unit: tuple[str, int, int | None], chunker: str = "fixed",
+                 chunk_tokens: int = MAX_TOKENS) -> list[dict]:
+    """
+    Extract + chunk one work unit: (pdf, first page, end page) with 0-based pages.
+    Runs in a worker process.
+    """
+    pdf, start, end = unit
+    pages = extract_text_from_pdf(os.path.join(DOCS_DIR, pdf), start, end, lines=chunker == "semantic")
+    if chunker == "semantic":
+        # chunks can span pages within the unit (use --pages-per-unit 0 to never cut at unit edges)
+        return chunk_pages(pages, pdf, max_tokens=chunk_tokens)
     documents = []
-    pdf_files = sorted([f for f in os.listdir(DOCS_DIR) if f.lower().endswith(".pdf")])
+    for page in pages:
+        for chunk in chunk_text(page["text"]):
+            documents.append({
+                "text": chunk,
+                "source": pdf,
+                "page": page["page_num"]
+                })
+    return documents
 
-    if not pdf_files:
-        raise RuntimeError("No PDFs found in docs/ folder.")
-    print("Found PDFs:", pdf_files)
 
-    for pdf in pdf_files:
-        pdf_path = os.path.join(DOCS_DIR, pdf)
-        pages = extract_text_from_pdf(pdf_path)
+def make_units(pdfs: list[str], pages_per_unit: int) -> list[tuple[str, int, int | None]]:
+    # 0 -> one unit per file; otherwise split large PDFs into page ranges
+    if pages_per_unit <= 0:
+        return [(pdf, 0, None) for pdf in pdfs]
+    units = []
+    for pdf in pdfs:
+        n_pages = len(PdfReader(os.path.join(DOCS_DIR, pdf)).pages)
+        units.extend((pdf, start, start + pages_per_unit) for start in range(0, n_pages, pages_per_unit))
+    return units
+
+
+def iter_chunks(pdfs: list[str], workers: int = 1, pages_per_unit: int = 0,
+                chunker: str = "fixed", chunk_tokens: int = MAX_TOKENS):
+    """
+    Yield (pdf, chunk records) per work unit, extracted across a process pool.
+    Units come back in submission order (file, then page), so chunk ids are
+    identical between runs regardless of which worker finishes first.
+    """
+    units = make_units(pdfs, pages_per_unit)
+    extract = partial(extract_unit, chunker=chunker, chunk_tokens=chunk_tokens)
+    if workers <= 1 or len(units) <= 1:
+        for unit in units:
+            yield unit[0], extract(unit)
+        return
+
+    # keep a bounded number of units in flight (extraction outpaces encoding,
+    # so submitting everything would hold the text of the whole corpus) and yield in order
+    workers = min(workers, len(units))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = []
+        for unit in units:
+            pending.append((unit, pool.submit(extract, unit)))
+            if len(pending) >= workers * 2:
+                done, future = pending.pop(0)
+                yield done[0], future.result()
+        while pending:
+            done, future = pending.pop(0)
+            yield done[0], future.result()
+
+
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
 
-        for page in pages:
-            chunks = chunk_text(page["text"])
-            for chunk in chunks:
-                documents.append({
-                    "text": chunk,
-                    "source": pdf,
-                    "page": page["page_num"]
-                    })
-    print("Total chunks:", len(documents))
 
-    embedder = SentenceTransformer(MODEL_NAME)
-    texts = [d["text"] for d in documents]
+def fingerprint(pdf: str, previous: dict | None = None) -> dict:
+    """
+    size + mtime + sha256 of a PDF. The hash is reused from the previous
+    manifest entry when size and mtime are unchanged.
+    """
+    st = os.stat(os.path.join(DOCS_DIR, pdf))
+    if previous and previous["size"] == st.st_size and previous["mtime_ns"] == st.st_mtime_ns:
+        sha = previous["sha256"]
+    else:
+        sha = file_sha256(os.path.join(DOCS_DIR, pdf))
+    return {"sha256": sha, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
 
-    embeddings = embedder.encode(texts, convert_to_numpy=True, show_progress_bar=True)
-    embeddings = embeddings.astype("float32")
 
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
+def load_manifest() -> dict | None:
+    path = os.path.join(INDEX_DIR, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
 
-    faiss.write_index(index, os.path.join(INDEX_DIR, "docs.index"))
 
-    with open(os.path.join(INDEX_DIR, "docs_meta.pkl"), "wb") as f:
-        pickle.dump(documents, f)
+def save_manifest(manifest: dict):
+    with open(os.path.join(INDEX_DIR, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
 
+
+def open_embed_store(args, embedder: SentenceTransformer) -> EmbeddingStore | None:
+    if args.embed_cache_mb <= 0:
+        return None
+    return EmbeddingStore(args.embed_cache, MODEL_NAME, args.embed_backend,
+                          embedder.get_sentence_embedding_dimension(), args.embed_cache_mb)
+
+
+def stream_files(pdfs: list[str], next_id: int, builder: StreamingIndexBuilder, meta: MetaStoreWriter,
+                 embedder: SentenceTransformer, args, stats: dict) -> dict:
+    """
+    Extract, chunk and embed pdfs, assigning each file a contiguous id range from next_id.
+    Chunks are encoded in batches of args.embed_batch and handed to the index
+    builder and metadata writer straight away, so at most one batch of vectors
+    (and its texts) is held in RAM. Chunks whose text is in the embedding
+    store (rag/embed_store.py) are not encoded again.
+    Returns {pdf: (id_start, id_end)}.
+    """
+    ranges = {}
+    first_id = next_id
+    pending_ids, pending_texts = [], []
+    store = open_embed_store(args, embedder)
+    encode = lambda texts: embedder.encode(texts, convert_to_numpy=True)
+
+    def flush():
+        start = time.perf_counter()
+        vectors = store.encode(pending_texts, encode) if store is not None else encode(pending_texts)
+        stats["embed_s"] += time.perf_counter() - start
+        builder.add(vectors, np.asarray(pending_ids, dtype="int64"))
+        stats["chunks"] += len(pending_ids)
+        pending_ids.clear()
+        pending_texts.clear()
+
+    for pdf, chunks in iter_chunks(pdfs, args.workers, args.pages_per_unit, args.chunker, args.chunk_tokens):
+        start, _ = ranges.get(pdf, (next_id, next_id))
+        for chunk in chunks:
+            meta.add(next_id, chunk)
+            pending_ids.append(next_id)
+            pending_texts.append(chunk["text"])
+            next_id += 1
+            if len(pending_ids) >= args.embed_batch:
+                flush()
+        ranges[pdf] = (start, next_id)
+    if pending_ids:
+        flush()
+    if store is not None:
+        evicted = store.close()
+        stats["cache"] = {**store.stats(), "evicted": evicted}
+
+    for pdf in pdfs:
+        ranges.setdefault(pdf, (next_id, next_id))
+    print("New chunks:", next_id - first_id)
+    return ranges
+
+
+def print_build_stats(stats: dict, started: float):
+    elapsed = time.perf_counter() - started
+    # ru_maxrss is in KiB on Linux
+    rss_main = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    rss_workers = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    print(f"Embedded {stats['chunks']} chunks in {elapsed:.1f}s "
+          f"({stats['chunks'] / elapsed:.1f} chunks/s overall, "
+          f"{stats['chunks'] / max(stats['embed_s'], 1e-9):.1f} chunks/s encoding)")
+    print(f"Peak RSS: {rss_main:.0f} MB (builder) | {rss_workers:.0f} MB (largest extraction worker)")
+    cache = stats.get("cache")
+    if cache:
+        saved = f"~{cache['saved_s']:.1f}s" if cache["saved_s"] is not None else "unknown (no encode timing yet)"
+        print(f"Embedding cache: {cache['hits']} hits / {cache['misses']} encoded "
+              f"(hit ratio {cache['hit_ratio']:.1%}), encode time saved {saved}, "
+              f"{cache['entries']} entries, {cache['evicted']} evicted")
+
+
+def save_index(index, meta: MetaStoreWriter, manifest: dict, index_type: str, params: dict, embed_backend: str):
+    # write + rename: a server may have the current file memory-mapped
+    path = os.path.join(INDEX_DIR, "docs.index")
+    faiss.write_index(index, path + ".tmp")
+    os.replace(path + ".tmp", path)
+    save_index_config(
+        INDEX_DIR, index_type, params,
+        dim=int(index.d), ntotal=int(index.ntotal), model=MODEL_NAME, embed_backend=embed_backend,
+    )
+    meta.commit()
+    save_lexical_index()
+    save_manifest(manifest)
     print("Index saved to rag/index/")
 
+
+def save_lexical_index():
+    # rebuilt from the whole committed store, so incremental builds stay consistent
+    start = time.perf_counter()
+    vocab_size = build_lexical_index(INDEX_DIR, MetaStore(INDEX_DIR))
+    print(f"Lexical (BM25) index: {vocab_size} terms in {time.perf_counter() - start:.1f}s")
+
+
+def chunker_config(args) -> dict:
+    if args.chunker == "semantic":
+        return {"name": "semantic", "max_tokens": args.chunk_tokens}
+    return {"name": "fixed"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Build the FAISS index over docs/*.pdf")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only re-embed new/changed PDFs and drop vectors of deleted ones")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes for PDF text extraction + chunking")
+    parser.add_argument("--pages-per-unit", type=int, default=0,
+                        help="split PDFs into page ranges of this size per work unit (0 = whole file)")
+    parser.add_argument("--chunker", choices=CHUNKERS, default="fixed",
+                        help="fixed = 800-char windows per page; semantic = sentence/heading/list aware, token-budgeted")
+    parser.add_argument("--chunk-tokens", type=int, default=MAX_TOKENS,
+                        help="semantic chunker: estimated tokens per chunk (embedder truncates at 256)")
+    parser.add_argument("--embed-backend", choices=BACKENDS, default=EMBED_BACKEND,
+                        help="embedding runtime (default: EMBED_BACKEND env or torch)")
+    parser.add_argument("--embed-cache", default=EMBED_CACHE_DIR,
+                        help="directory of the persistent chunk embedding cache")
+    parser.add_argument("--embed-cache-mb", type=float, default=EMBED_CACHE_MB,
+                        help="size limit of the embedding cache per model/backend (0 = disable the cache)")
+    parser.add_argument("--embed-batch", type=int, default=256,
+                        help="chunks encoded and added to the index per batch (bounds vectors held in RAM)")
+    parser.add_argument("--index-type", choices=INDEX_TYPES,
+                        help="flat = exact (default); ivf / ivfpq / hnsw = approximate")
+    parser.add_argument("--nlist", type=int, help="IVF: number of coarse clusters (capped at training vectors / 39)")
+    parser.add_argument("--nprobe", type=int, help="IVF: clusters scanned per query")
+    parser.add_argument("--pq-m", type=int, help="IVF-PQ: sub-quantizers (must divide embedding dim)")
+    parser.add_argument("--pq-nbits", type=int, help="IVF-PQ: bits per sub-quantizer code")
+    parser.add_argument("--hnsw-m", type=int, help="HNSW: graph neighbours per node")
+    parser.add_argument("--ef-construction", type=int, help="HNSW: build-time search depth")
+    parser.add_argument("--ef-search", type=int, help="HNSW: query-time search depth")
+    parser.add_argument("--train-sample", type=int, default=50_000,
+                        help="IVF/PQ: train on a random sample of N embeddings (kept in RAM during the build)")
+    return parser.parse_args()
+
+
+def full_build(args, pdf_files: list[str], fingerprints: dict, stats: dict):
+    index_type = args.index_type or "flat"
+    embedder = load_embedder(MODEL_NAME, args.embed_backend)
+    builder = StreamingIndexBuilder(
+        index_type,
+        embedder.get_sentence_embedding_dimension(),
+        params={
+            "nlist": args.nlist,
+            "nprobe": args.nprobe,
+            "pq_m": args.pq_m,
+            "pq_nbits": args.pq_nbits,
+            "M": args.hnsw_m,
+            "ef_construction": args.ef_construction,
+            "ef_search": args.ef_search,
+        },
+        train_sample=args.train_sample,
+        spill_dir=INDEX_DIR,
+    )
+    meta = MetaStoreWriter(INDEX_DIR)
+    ranges = stream_files(pdf_files, 0, builder, meta, embedder, args, stats)
+    index, params = builder.finish()
+    print("Total chunks:", len(meta))
+    print(f"Index type: {index_type} | params: {params}")
+
+    manifest = {
+        "model": MODEL_NAME,
+        "embed_backend": args.embed_backend,
+        "chunker": chunker_config(args),
+        "index_type": index_type,
+        "next_id": len(meta),
+        "files": {pdf: {**fingerprints[pdf], "id_start": ranges[pdf][0], "id_end": ranges[pdf][1]}
+                  for pdf in pdf_files},
+    }
+    save_index(index, meta, manifest, index_type, params, args.embed_backend)
+
+
+def incremental_build(args, pdf_files: list[str], fingerprints: dict, manifest: dict, stats: dict) -> bool:
+    """
+    Apply docs/ changes to the existing index. Returns False if a full rebuild is needed.
+    """
+    config = load_index_config(INDEX_DIR)
+    index_type = config["index_type"]
+    if not store_exists(INDEX_DIR):
+        print("No metadata store found; full rebuild needed")
+        return False
+    if (manifest.get("model") != MODEL_NAME
+            or manifest.get("embed_backend", "torch") != args.embed_backend
+            or manifest.get("chunker", {"name": "fixed"}) != chunker_config(args)
+            or (args.index_type and args.index_type != index_type)):
+        print("Embedding model/backend, chunker or index type changed; full rebuild needed")
+        return False
+
+    indexed = manifest["files"]
+    added = [p for p in pdf_files if p not in indexed or indexed[p]["sha256"] != fingerprints[p]["sha256"]]
+    removed = [p for p in indexed if p not in fingerprints or p in added]
+    print(f"Incremental: {len(added)} new/changed, {len(removed)} removed/changed, "
+          f"{len(pdf_files) - len(added)} unchanged")
+
+    if not added and not removed:
+        # only mtimes may have moved; keep the index files untouched
+        for pdf in pdf_files:
+            indexed[pdf].update(fingerprints[pdf])
+        if not lexical_exists(INDEX_DIR):
+            save_lexical_index()
+        save_manifest(manifest)
+        print("Index is up to date")
+        return True
+
+    if removed and not supports_remove(index_type):
+        print(f"'{index_type}' index cannot remove vectors; full rebuild needed")
+        return False
+
+    index = faiss.read_index(os.path.join(INDEX_DIR, "docs.index"))
+    removed_ranges = []
+    for pdf in removed:
+        start, end = indexed[pdf]["id_start"], indexed[pdf]["id_end"]
+        index.remove_ids(faiss.IDSelectorRange(start, end))
+        removed_ranges.append((start, end))
+        del indexed[pdf]
+
+    # carry surviving rows over to the new store (ids stay sorted: new ids are all > next_id)
+    meta = MetaStoreWriter(INDEX_DIR)
+    for chunk_id, chunk in MetaStore(INDEX_DIR).items():
+        if not any(start <= chunk_id < end for start, end in removed_ranges):
+            meta.add(chunk_id, chunk)
+
+    builder = StreamingIndexBuilder.from_index(index, index_type, config["params"])
+    ranges = stream_files(added, manifest["next_id"], builder, meta, load_embedder(MODEL_NAME, args.embed_backend), args, stats)
+    new_chunks = sum(end - start for start, end in ranges.values())
+
+    for pdf in pdf_files:
+        entry = indexed.get(pdf, {})
+        if pdf in ranges:
+            entry = {"id_start": ranges[pdf][0], "id_end": ranges[pdf][1]}
+        indexed[pdf] = {**entry, **fingerprints[pdf]}
+    manifest["next_id"] += new_chunks
+
+    print("Total chunks:", index.ntotal)
+    save_index(index, meta, manifest, index_type, config["params"], args.embed_backend)
+    return True
+
+
+def main():
+    args = parse_args()
+    Path(INDEX_DIR).mkdir(parents=True, exist_ok=True)
+    pdf_files = sorted([f for f in os.listdir(DOCS_DIR) if f.lower().endswith(".pdf")])
+
+    if not pdf_files:
+        raise RuntimeError("No PDFs found in docs/ folder.")
+    print("Found PDFs:", pdf_files)
+
+    started = time.perf_counter()
+    stats = {"chunks": 0, "embed_s": 0.0}
+    manifest = load_manifest() if args.incremental else None
+    previous = manifest["files"] if manifest else {}
+    fingerprints = {pdf: fingerprint(pdf, previous.get(pdf)) for pdf in pdf_files}
+
+    if manifest is None or not incremental_build(args, pdf_files, fingerprints, manifest, stats):
+        full_build(args, pdf_files, fingerprints, stats)
+    print_build_stats(stats, started)
+
 if __name__=="__main__":
     main()
@@ -0,0 +1,263 @@
+import re
+from collections import Counter
+
+# Structure-aware chunking: page text is split into headings, numbered/bulleted
+# list items and sentences, which are packed into chunks of at most max_tokens.
+# Chunks may cross page boundaries (page .. page_end); a list is only split
+# between items (a long item also after one of its sentences), and only when
+# it does not fit in one chunk.
+
+# all-MiniLM-L6-v2 truncates input at 256 word pieces; stay below that
+MAX_TOKENS = 200
+OVERLAP_TOKENS = 32
+# lines at the top and at the bottom of a page checked for running headers/footers and page numbers
+EDGE_LINES = 2
+
+_LIST_ITEM_RE = re.compile(r"^\s*(?:\d{1,2}[.)]|[a-z][.)]|[-•●○▪Ø*])\s+")
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+# a paragraph line ending otherwise is continued by the next line
+_CLAUSE_ENDS = (".", "!", "?", ":", ";")
+# left lowercase in Title Case headings
+_TITLE_SMALL_WORDS = {"a", "an", "and", "as", "at", "by", "for", "from", "in", "of", "on", "or", "the", "to", "with"}
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+# "3", "Page 3", "Page 3 of 12", "- 3 -" (only matched on a page's first / last lines)
+_PAGE_NUMBER_RE = re.compile(r"^[-\s]*(?:page\s*)?\d+(?:\s*(?:of|/)\s*\d+)?[-\s]*$", re.IGNORECASE)
+
+
+def estimate_tokens(text: str) -> int:
+    # words + punctuation, +25% for sub-word splits of the embedder's tokenizer
+    return int(len(_TOKEN_RE.findall(text)) * 1.25) + 1
+
+
+def _is_heading(line: str) -> bool:
+    words = line.split()
+    if not words or len(words) > 10 or line.endswith((".", ",", ";")) or line[0].islower():
+        return False
+    if _SENTENCE_END_RE.search(line):
+        # "decision thereon. The Appellate Authority": the end of one sentence and the start of the next
+        return False
+    if line.endswith(":") or line.isupper():
+        return True
+    # Title Case lines ("Retention Actions for High Risk Customers"): every word but short function words capitalized
+    return not any(w[0].islower() for w in words if w.lower() not in _TITLE_SMALL_WORDS)
+
+
+def _fragmented(text: str) -> bool:
+    # plain pypdf output of PDFs that draw every word as its own text object: one word per line
+    lines = [line for line in text.splitlines() if line.strip()]
+    return len(lines) >= 20 and sum(len(line.split()) == 1 for line in lines) >= 0.9 * len(lines)
+
+
+def page_text(page) -> str:
+    """
+    Text of a pypdf page with its real line breaks. Pages whose plain extraction
+    comes out one word per line are re-extracted in layout mode, which rebuilds
+    the lines from glyph positions (plain mode is kept otherwise: layout mode
+    interleaves the lines of multi-column pages).
+    """
+    text = page.extract_text() or ""
+    if _fragmented(text):
+        text = page.extract_text(extraction_mode="layout") or text
+    return text
+
+
+def _lines(text: str) -> list[str]:
+    # whitespace-normalized non-empty lines; fragment-per-line text has no usable
+    # line breaks, so it is kept as one line rather than read as headings / page numbers
+    lines = [" ".join(raw.split()) for raw in text.splitlines()]
+    lines = [line for line in lines if line]
+    return [" ".join(lines)] if _fragmented(text) else lines
+
+
+def _edge(lines: list[str]) -> list[str]:
+    # where running headers, footers and page numbers sit
+    return lines[:EDGE_LINES] + lines[-EDGE_LINES:]
+
+
+def _repeated_lines(pages: list[list[str]]) -> set[str]:
+    """
+    Running headers/footers: lines of at least two words among the first / last
+    EDGE_LINES lines of more than half of the pages.
+    """
+    if len(pages) < 3:
+        return set()
+    counts = Counter()
+    for lines in pages:
+        counts.update({line for line in _edge(lines) if len(line.split()) > 1 and len(line) <= 80})
+    return {line for line, n in counts.items() if n > len(pages) / 2}
+
+
+def page_lines(pages: list[dict]) -> list[list[str]]:
+    """
+    Normalized lines of each page without running headers/footers and page numbers.
+    """
+    pages = [_lines(page["text"]) for page in pages]
+    skip = _repeated_lines(pages)
+    kept = []
+    for lines in pages:
+        kept.append([line for i, line in enumerate(lines)
+                     if EDGE_LINES <= i < len(lines) - EDGE_LINES or not (line in skip or _PAGE_NUMBER_RE.match(line))])
+    return kept
+
+
+def segment(pages: list[dict]) -> list[dict]:
+    """
+    Split pages into segments {"text", "page", "kind"} with kind one of
+    heading / item (list item, continuation lines included) / sentence.
+    """
+    segments = []
+    for page, lines in zip(pages, page_lines(pages)):
+        paragraph: list[str] = []
+
+        def flush_paragraph():
+            text = " ".join(paragraph)
+            paragraph.clear()
+            for sentence in _SENTENCE_END_RE.split(text):
+                if sentence.strip():
+                    segments.append({"text": sentence.strip(), "page": page["page_num"], "kind": "sentence"})
+
+        for line in lines:
+            # a heading-like line right after an unfinished sentence is the rest of that sentence
+            continues = paragraph and not paragraph[-1].endswith(_CLAUSE_ENDS)
+            if _LIST_ITEM_RE.match(line):
+                flush_paragraph()
+                segments.append({"text": line, "page": page["page_num"], "kind": "item"})
+            elif _is_heading(line) and not continues:
+                flush_paragraph()
+                segments.append({"text": line, "page": page["page_num"], "kind": "heading"})
+            elif segments and segments[-1]["kind"] == "item" and not paragraph:
+                # wrapped line of the previous list item (possibly continued on the next page)
+                segments[-1]["text"] += " " + line
+            else:
+                paragraph.append(line)
+        flush_paragraph()
+    return segments
+
+
+def _split_long(seg: dict, max_tokens: int, count) -> list[dict]:
+    # a single segment over budget: split on sentences, then on words
+    pieces = [p for p in _SENTENCE_END_RE.split(seg["text"]) if p.strip()]
+    out, words = [], []
+    for piece in pieces:
+        for word in piece.split():
+            words.append(word)
+            if count(" ".join(words)) >= max_tokens:
+                out.append(" ".join(words[:-1]))
+                words = [word]
+        if count(" ".join(words)) >= max_tokens // 2:
+            out.append(" ".join(words))
+            words = []
+    if words:
+        out.append(" ".join(words))
+    return [{**seg, "text": text} for text in out if text]
+
+
+def _take(seg: dict, budget: int, count) -> tuple[dict, dict]:
+    # split seg into a first part of at most budget tokens (at least one word) and the rest
+    words = seg["text"].split()
+    n = 1
+    while n < len(words) and count(" ".join(words[:n + 1])) <= budget:
+        n += 1
+    return {**seg, "text": " ".join(words[:n])}, {**seg, "text": " ".join(words[n:])}
+
+
+def _take_sentences(seg: dict, budget: int, count) -> tuple[dict, dict]:
+    # split seg after its last sentence that ends within budget tokens (head is empty if none does)
+    sentences = [p for p in _SENTENCE_END_RE.split(seg["text"]) if p.strip()]
+    n = 0
+    while n < len(sentences) - 1 and count(" ".join(sentences[:n + 1])) <= budget:
+        n += 1
+    return {**seg, "text": " ".join(sentences[:n])}, {**seg, "text": " ".join(sentences[n:])}
+
+
+def chunk_pages(pages: list[dict], source: str, max_tokens: int = MAX_TOKENS,
+                overlap_tokens: int = OVERLAP_TOKENS, count_tokens=estimate_tokens) -> list[dict]:
+    """
+    Chunk the pages of one document into {"text", "source", "page", "page_end"} records.
+
+    Boundaries are taken at headings (a heading starts a new chunk once the
+    current one is a quarter full) and between sentences / list items. The
+    last sentence of a chunk is repeated at the start of the next one if it
+    is at most overlap_tokens long (never on its own: a document ending in
+    the repeated sentence gets no extra chunk). Every line kept by page_lines
+    ends up in some chunk.
+    """
+    segments = []
+    for seg in segment(pages):
+        tokens = count_tokens(seg["text"])
+        if tokens > max_tokens:
+            segments.extend((s, count_tokens(s["text"])) for s in _split_long(seg, max_tokens, count_tokens))
+        else:
+            segments.append((seg, tokens))
+
+    chunks = []
+    current: list[tuple[dict, int]] = []
+    size = 0
+    # current holds only the sentence repeated from the previous chunk
+    carried = False
+
+    def emit(force: bool = False):
+        nonlocal current, size, carried
+        body = [s for s, _ in current]
+        if not force and all(s["kind"] == "heading" for s in body):
+            # headings alone: keep them for the chunk of their first paragraph / list
+            return
+        text = " ".join(s["text"] for s in body)
+        chunks.append({"text": text, "source": source, "page": body[0]["page"], "page_end": body[-1]["page"]})
+        last, last_tokens = current[-1]
+        current, size = [], 0
+        carried = last["kind"] == "sentence" and last_tokens <= overlap_tokens
+        if carried:
+            current, size = [(last, last_tokens)], last_tokens
+
+    def keep_headings():
+        # drop the overlap sentence, keep headings that are still waiting for their content
+        nonlocal current, size
+        current = [(s, t) for s, t in current if s["kind"] == "heading"]
+        size = sum(t for _, t in current)
+
+    i = 0
+    while i < len(segments):
+        seg, tokens = segments[i]
+        if seg["kind"] == "heading" and size >= max_tokens // 4:
+            emit()
+            # overlap from the previous section does not belong under a new heading
+            keep_headings()
+        elif seg["kind"] == "item" and current and current[-1][0]["kind"] != "item" and size >= max_tokens // 4:
+            # start a list in a fresh chunk if the whole list fits there
+            list_tokens = tokens
+            for nxt, nxt_tokens in segments[i + 1:]:
+                if nxt["kind"] != "item":
+                    break
+                list_tokens += nxt_tokens
+            if size + list_tokens > max_tokens >= list_tokens:
+                emit()
+        if (seg["kind"] == "item" and size + tokens > max_tokens and current
+                and min(tokens, max_tokens - size) >= max_tokens // 4):
+            # a long list item (a numbered clause) that does not fit: its leading sentences fill the chunk
+            head, rest = _take_sentences(seg, max_tokens - size, count_tokens)
+            if head["text"] and rest["text"]:
+                segments[i:i + 1] = [(head, count_tokens(head["text"])), (rest, count_tokens(rest["text"]))]
+                seg, tokens = segments[i]
+        if size + tokens > max_tokens and current:
+            emit()
+            if size + tokens > max_tokens:
+                keep_headings()
+            if current and size + tokens > max_tokens:
+                if max_tokens - size < max_tokens // 4:
+                    # headings fill the budget on their own
+                    emit(force=True)
+                    current, size = [], 0
+                else:
+                    # split the segment so its start stays under its heading
+                    head, rest = _take(seg, max_tokens - size, count_tokens)
+                    if rest["text"]:
+                        segments[i:i + 1] = [(head, count_tokens(head["text"])), (rest, count_tokens(rest["text"]))]
+                        seg, tokens = segments[i]
+        current.append((seg, tokens))
+        size += tokens
+        carried = False
+        i += 1
+    if current and not carried:
+        emit(force=True)
+    return chunks
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+# Build-time embedding cache: blake2b(chunk text) -> float32 vector, one store per model/backend.
+# The vectors file holds the vectors back to back (row i belongs to keys[i]) and is
+# memory-mapped for reads; new vectors are appended to it during a build.
+# close() writes new keys/last_used files (and a compacted vectors file after eviction)
+# under new names and then switches META_FILE to them, so a build that dies half-way
+# leaves the previous state intact.
+META_FILE = "store.json"
+
+DEFAULT_DIR = "rag/embed_cache"
+DEFAULT_MAX_MB = 1024
+
+_KEY_DTYPE = np.dtype("V16")
+
+
+def content_key(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingStore:
+    """
+    Persistent text -> vector cache consulted by rag/build_index.py before encoding,
+    so a rebuild (new chunker settings, index type, ...) only embeds text it has not seen.
+
+    Entries are evicted least-recently-used by build once the vectors exceed max_mb:
+    every open() is a new generation, and entries hit or added in it are marked with it.
+    """
+
+    def __init__(self, root: str, model: str, backend: str, dim: int, max_mb: float = DEFAULT_MAX_MB):
+        self.dir = os.path.join(root, re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{model}__{backend}"))
+        os.makedirs(self.dir, exist_ok=True)
+        self.dim = dim
+        self.max_rows = int(max_mb * 1e6) // (dim * 4)
+
+        meta = self._read_meta()
+        if meta and meta["dim"] != dim:
+            # same name, different output size: nothing in the store is usable
+            meta = None
+        self.generation = (meta or {}).get("generation", 0) + 1
+        # seconds per chunk of the last build that encoded something (estimates time saved)
+        self.encode_s_per_chunk = (meta or {}).get("encode_s_per_chunk")
+
+        if meta:
+            self._files = meta["files"]
+            keys = np.load(self._path(self._files["keys"]))
+            self._used = np.load(self._path(self._files["used"])).tolist()
+        else:
+            self._files = {"vectors": f"vectors-{self.generation}.f32"}
+            keys, self._used = np.empty(0, dtype=_KEY_DTYPE), []
+        self._slots = {k.tobytes(): i for i, k in enumerate(keys)}
+        # drop vectors appended by a build that never reached close()
+        with open(self._path(self._files["vectors"]), "ab") as f:
+            f.truncate(len(self._slots) * dim * 4)
+        self._vectors = self._map(len(self._slots))
+        self._append = open(self._path(self._files["vectors"]), "ab")
+        self._rows = len(self._slots)
+
+        self.hits = 0
+        self.misses = 0
+        self.encode_s = 0.0
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def _read_meta(self) -> dict | None:
+        if not os.path.exists(self._path(META_FILE)):
+            return None
+        with open(self._path(META_FILE)) as f:
+            meta = json.load(f)
+        if not all(os.path.exists(self._path(name)) for name in meta["files"].values()):
+            return None
+        return meta
+
+    def _map(self, rows: int) -> np.ndarray:
+        if rows == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        return np.memmap(self._path(self._files["vectors"]), dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+    def __len__(self):
+        return len(self._slots)
+
+    def encode(self, texts: list[str], encode) -> np.ndarray:
+        """
+        Vectors for texts: cached ones are read from the store, the rest come
+        from encode(list of texts) -> (n, dim) and are added to it.
+        """
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        keys = [content_key(t) for t in texts]
+        missing: dict[bytes, list[int]] = {}
+        hit_rows, hit_slots = [], []
+        for i, key in enumerate(keys):
+            slot = self._slots.get(key)
+            if slot is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                hit_rows.append(i)
+                hit_slots.append(slot)
+                self._used[slot] = self.generation
+
+        if hit_slots:
+            if max(hit_slots) >= len(self._vectors):
+                self._append.flush()
+                self._vectors = self._map(self._rows)
+            out[hit_rows] = self._vectors[hit_slots]
+        self.hits += len(hit_rows)
+
+        if missing:
+            first = [rows[0] for rows in missing.values()]
+            start = time.perf_counter()
+            vectors = np.asarray(encode([texts[i] for i in first]), dtype=np.float32)
+            self.encode_s += time.perf_counter() - start
+            self.misses += len(first)
+            self._append.write(vectors.tobytes())
+            for key, rows, vec in zip(missing, missing.values(), vectors):
+                out[rows] = vec
+                self._slots[key] = self._rows
+                self._used.append(self.generation)
+                self._rows += 1
+            # repeated texts within the batch count as hits
+            self.hits += len(texts) - len(hit_rows) - len(first)
+        return out
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        per_chunk = self.encode_s / self.misses if self.misses else self.encode_s_per_chunk
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "encode_s": self.encode_s,
+            # None until some build has measured the encoding speed
+            "saved_s": self.hits * per_chunk if per_chunk is not None else None,
+            "entries": len(self._slots),
+        }
+
+    def close(self) -> int:
+        """
+        Evict down to max_mb (oldest generations first) and persist the store.
+        Returns the number of evicted entries.
+        """
+        self._append.close()
+        keys = np.frombuffer(b"".join(self._slots), dtype=_KEY_DTYPE)
+        used = np.asarray(self._used, dtype=np.int64)
+        files = {"keys": f"keys-{self.generation}.npy", "used": f"last_used-{self.generation}.npy",
+                 "vectors": self._files["vectors"]}
+        evicted = 0
+        if len(keys) > self.max_rows:
+            # stable: among equally old entries, keep the earliest rows
+            keep = np.sort(np.argsort(-used, kind="stable")[:self.max_rows])
+            evicted = len(keys) - len(keep)
+            # a store created in this build is already appending to vectors-<generation>.f32
+            files["vectors"] = f"vectors-{self.generation}-compacted.f32"
+            with open(self._path(files["vectors"]), "wb") as f:
+                f.write(np.ascontiguousarray(self._map(len(keys))[keep]).tobytes())
+            keys, used = keys[keep], used[keep]
+            self._slots = {k.tobytes(): i for i, k in enumerate(keys)}
+            self._used = used.tolist()
+        self._vectors = None
+
+        np.save(self._path(files["keys"]), keys)
+        np.save(self._path(files["used"]), used)
+        meta = {"dim": self.dim, "generation": self.generation, "entries": int(len(keys)), "files": files,
+                "encode_s_per_chunk": self.encode_s / self.misses if self.misses else self.encode_s_per_chunk}
+        with open(self._path(META_FILE) + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(self._path(META_FILE) + ".tmp", self._path(META_FILE))
+
+        # files of earlier generations (and of builds that never finished)
+        for name in os.listdir(self.dir):
+            if name != META_FILE and name not in files.values():
+                os.remove(self._path(name))
+        return evicted
@@ -0,0 +1,31 @@
+import os
+
+from sentence_transformers import SentenceTransformer
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# torch     = SentenceTransformer on PyTorch fp32 (reference)
+# onnx      = same weights exported to ONNX Runtime
+# onnx-int8 = dynamically quantized (int8) ONNX export
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+# quantized file published in the model repo; pick the variant matching the CPU (avx2 / avx512 / avx512_vnni / arm64)
+ONNX_INT8_FILE = os.getenv("EMBED_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+
+
+def load_embedder(model_name: str = MODEL_NAME, backend: str | None = None) -> SentenceTransformer:
+    """
+    SentenceTransformer for the selected backend (EMBED_BACKEND by default).
+    All backends keep the model's pooling + normalization, so their vectors
+    live in the same space as an index built with the torch backend.
+    ONNX backends need `pip install "sentence-transformers[onnx]"`.
+    """
+    backend = backend or EMBED_BACKEND
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(model_name, backend="onnx", model_kwargs={"file_name": ONNX_INT8_FILE})
+    raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
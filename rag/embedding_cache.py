@@ -0,0 +1,74 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_query(text: str) -> str:
+    # case/whitespace variants of the same question share one cache entry
+    return " ".join(text.split()).lower()
+
+
+class EmbeddingCache:
+    """
+    Bounded, thread-safe LRU cache: normalized query text -> float32 vector.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> np.ndarray | None:
+        key = normalize_query(text)
+        with self._lock:
+            vec = self._data.get(key)
+            if vec is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return vec
+
+    def put(self, text: str, vec: np.ndarray):
+        if self.max_size <= 0:
+            return
+        key = normalize_query(text)
+        vec = np.asarray(vec, dtype="float32")
+        # cached vectors are shared between requests
+        vec.setflags(write=False)
+        with self._lock:
+            self._data[key] = vec
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def get_or_encode(self, text: str, encode) -> np.ndarray:
+        """
+        Return the cached vector for text, calling encode(text) -> (dim,) on a miss.
+        """
+        vec = self.get(text)
+        if vec is None:
+            vec = np.asarray(encode(text), dtype="float32")
+            self.put(text, vec)
+        return vec
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._data)
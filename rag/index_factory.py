@@ -0,0 +1,319 @@
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+import faiss
+
+INDEX_TYPES = ("flat", "ivf", "ivfpq", "hnsw")
+CONFIG_FILE = "index_config.json"
+# k-means training points per IVF centroid below which faiss warns that clustering is unreliable
+MIN_POINTS_PER_CENTROID = 39
+
+DEFAULT_PARAMS = {
+    "flat": {},
+    "ivf": {"nlist": 100, "nprobe": 8},
+    "ivfpq": {"nlist": 100, "nprobe": 8, "pq_m": 16, "pq_nbits": 8},
+    "hnsw": {"M": 32, "ef_construction": 200, "ef_search": 64},
+}
+
+
+def resolve_params(index_type: str, overrides: dict | None = None) -> dict:
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+    params = dict(DEFAULT_PARAMS[index_type])
+    params.update({k: v for k, v in (overrides or {}).items() if v is not None and k in params})
+    return params
+
+
+def make_index(index_type: str, dim: int, params: dict) -> faiss.Index:
+    """
+    Every index type accepts add_with_ids, so chunk ids stay stable across
+    incremental updates (IVF stores ids natively, flat/HNSW via IndexIDMap2).
+    """
+    if index_type == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+    if index_type == "ivf":
+        quantizer = faiss.IndexFlatL2(dim)
+        return faiss.IndexIVFFlat(quantizer, dim, params["nlist"], faiss.METRIC_L2)
+    if index_type == "ivfpq":
+        if dim % params["pq_m"] != 0:
+            raise ValueError(f"pq_m={params['pq_m']} must divide the embedding dim {dim}")
+        quantizer = faiss.IndexFlatL2(dim)
+        return faiss.IndexIVFPQ(quantizer, dim, params["nlist"], params["pq_m"], params["pq_nbits"])
+    if index_type == "hnsw":
+        hnsw = faiss.IndexHNSWFlat(dim, params["M"])
+        hnsw.hnsw.efConstruction = params["ef_construction"]
+        return faiss.IndexIDMap2(hnsw)
+    raise ValueError(f"Unknown index type '{index_type}'")
+
+
+def supports_remove(index_type: str) -> bool:
+    # HNSW graphs cannot drop vectors; changed/deleted files force a full rebuild
+    return index_type != "hnsw"
+
+
+def _fit_params_to_sample(index_type: str, params: dict, n_train: int) -> dict:
+    """
+    Shrink nlist so k-means gets MIN_POINTS_PER_CENTROID training points per
+    centroid, nprobe to at most nlist, and pq_nbits to the sample size.
+    With the default nlist a small corpus would otherwise be spread over
+    lists too small for nprobe of them to hold top_k vectors.
+    """
+    params = dict(params)
+    if index_type in ("ivf", "ivfpq"):
+        nlist = max(1, min(params["nlist"], n_train // MIN_POINTS_PER_CENTROID))
+        if nlist != params["nlist"]:
+            print(f"nlist={params['nlist']} is too many clusters for {n_train} training vectors; using nlist={nlist}")
+            params["nlist"] = nlist
+        params["nprobe"] = min(params["nprobe"], nlist)
+    if index_type == "ivfpq":
+        while params["pq_nbits"] > 1 and 2 ** params["pq_nbits"] > n_train:
+            params["pq_nbits"] -= 1
+    return params
+
+
+def build_faiss_index(
+    embeddings: np.ndarray,
+    ids: np.ndarray | None = None,
+    index_type: str = "flat",
+    params: dict | None = None,
+    train_sample: int = 50_000,
+    seed: int = 42,
+) -> tuple[faiss.Index, dict]:
+    """
+    Create, train (on a random sample of embeddings) and fill an index.
+    ids defaults to 0..n-1. Returns (index, params actually used).
+    """
+    params = resolve_params(index_type, params)
+    n, dim = embeddings.shape
+
+    train = embeddings
+    if n > train_sample:
+        rng = np.random.default_rng(seed)
+        train = embeddings[rng.choice(n, size=train_sample, replace=False)]
+
+    params = _fit_params_to_sample(index_type, params, len(train))
+    index = make_index(index_type, dim, params)
+    if not index.is_trained:
+        index.train(train)
+    apply_search_params(index, params)
+    if ids is None:
+        ids = np.arange(n, dtype="int64")
+    index.add_with_ids(embeddings, ids)
+    return index, params
+
+
+class StreamingIndexBuilder:
+    """
+    Adds (vectors, ids) batches to an index as they are produced.
+
+    Flat/HNSW indexes are filled immediately. IVF/PQ indexes need training
+    before any vector is added: they keep a uniform random sample (reservoir)
+    of at most train_sample vectors over the whole stream and spill the
+    vectors to a temporary file, then train and add them in finish().
+    Peak vector memory stays max(batch, train_sample) instead of the whole
+    corpus, and centroids are not biased towards the first documents.
+    """
+
+    # rows read back from the spill file per add_with_ids call
+    ADD_BATCH = 65_536
+
+    def __init__(self, index_type: str, dim: int, params: dict | None = None,
+                 train_sample: int = 50_000, index: faiss.Index | None = None,
+                 seed: int = 42, spill_dir: str | None = None):
+        self.index_type = index_type
+        self.dim = dim
+        self.params = resolve_params(index_type, params)
+        self.train_sample = train_sample
+        self.index = index
+        self._rng = np.random.default_rng(seed)
+        self._seen = 0
+        self._reservoir = None
+        self._spill = None
+
+        if self.index is None and index_type in ("flat", "hnsw"):
+            self.index = make_index(index_type, dim, self.params)
+            apply_search_params(self.index, self.params)
+        if self.index is None:
+            # grows up to train_sample rows as vectors arrive
+            self._reservoir = np.empty((0, dim), dtype="float32")
+            self._spill = (tempfile.TemporaryFile(dir=spill_dir), tempfile.TemporaryFile(dir=spill_dir))
+
+    @classmethod
+    def from_index(cls, index: faiss.Index, index_type: str, params: dict) -> "StreamingIndexBuilder":
+        # continue filling an already trained index (incremental builds)
+        return cls(index_type, index.d, params, index=index)
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        if self.index is not None:
+            self.index.add_with_ids(vectors, ids)
+            return
+        self._sample(vectors)
+        self._spill[0].write(vectors.tobytes())
+        self._spill[1].write(np.ascontiguousarray(ids, dtype="int64").tobytes())
+
+    def _sample(self, vectors: np.ndarray):
+        # reservoir sampling (algorithm R), one batch at a time
+        k = self.train_sample
+        pos = self._seen + np.arange(len(vectors))
+        fill = pos < k
+        if fill.any() and pos[fill][-1] >= len(self._reservoir):
+            grown = np.empty((min(k, max(2 * len(self._reservoir), pos[fill][-1] + 1)), self.dim), dtype="float32")
+            grown[:len(self._reservoir)] = self._reservoir
+            self._reservoir = grown
+        self._reservoir[pos[fill]] = vectors[fill]
+        rest = ~fill
+        if rest.any():
+            slots = self._rng.integers(0, pos[rest] + 1)
+            keep = slots < k
+            self._reservoir[slots[keep]] = vectors[rest][keep]
+        self._seen += len(vectors)
+
+    def _train_and_flush(self):
+        train = self._reservoir[:min(self._seen, self.train_sample)]
+        self.params = _fit_params_to_sample(self.index_type, self.params, len(train))
+        self.index = make_index(self.index_type, self.dim, self.params)
+        self.index.train(train)
+        apply_search_params(self.index, self.params)
+        self._reservoir = None
+
+        vectors_file, ids_file = self._spill
+        vectors_file.seek(0)
+        ids_file.seek(0)
+        for start in range(0, self._seen, self.ADD_BATCH):
+            n = min(self.ADD_BATCH, self._seen - start)
+            vectors = np.fromfile(vectors_file, dtype="float32", count=n * self.dim).reshape(n, self.dim)
+            self.index.add_with_ids(vectors, np.fromfile(ids_file, dtype="int64", count=n))
+        vectors_file.close()
+        ids_file.close()
+        self._spill = None
+
+    def finish(self) -> tuple[faiss.Index, dict]:
+        if self.index is None:
+            if not self._seen:
+                raise ValueError("No vectors were added to the index")
+            self._train_and_flush()
+        return self.index, self.params
+
+
+def apply_search_params(index: faiss.Index, params: dict):
+    """
+    Set query-time knobs (nprobe / efSearch); works through IDMap wrappers.
+    """
+    ps = faiss.ParameterSpace()
+    if "nprobe" in params:
+        ps.set_index_parameter(index, "nprobe", params["nprobe"])
+    if "ef_search" in params:
+        ps.set_index_parameter(index, "efSearch", params["ef_search"])
+
+
+def _unwrap(index: faiss.Index) -> faiss.Index:
+    index = faiss.downcast_index(index)
+    if isinstance(index, (faiss.IndexIDMap, faiss.IndexIDMap2)):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def _search_parameters(index: faiss.Index, sel: faiss.IDSelector) -> faiss.SearchParameters:
+    # IVF / HNSW only accept their own parameter types, which also carry the current nprobe / efSearch
+    inner = _unwrap(index)
+    if isinstance(inner, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=sel, nprobe=inner.nprobe)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=sel, efSearch=inner.hnsw.efSearch)
+    return faiss.SearchParameters(sel=sel)
+
+
+_direct_map_lock = threading.Lock()
+
+
+def reconstruct_ids(index: faiss.Index, ids: np.ndarray) -> np.ndarray:
+    """
+    Stored vectors for the given ids (decoded approximations for PQ).
+    IVF indexes get a hashtable id -> list position on first use.
+    """
+    inner = _unwrap(index)
+    if isinstance(inner, faiss.IndexIVF):
+        with _direct_map_lock:
+            if inner.direct_map.type == faiss.DirectMap.NoMap:
+                inner.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index.reconstruct_batch(np.ascontiguousarray(ids, dtype="int64"))
+
+
+def search_filtered(index: faiss.Index, queries: np.ndarray, k: int, ids: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Search only the vectors whose id is in ids (FAISS IDSelector pushed into the index scan).
+
+    Approximate indexes can come back with fewer than min(k, len(ids)) hits
+    when the filter is selective (few allowed vectors in the probed IVF lists
+    or HNSW neighbourhoods); those queries are answered exactly from the
+    reconstructed vectors of the allowed ids instead.
+    Returns (distances, ids) like index.search, padded with -1.
+    """
+    ids = np.ascontiguousarray(ids, dtype="int64")
+    nq = len(queries)
+    distances = np.full((nq, k), np.inf, dtype="float32")
+    labels = np.full((nq, k), -1, dtype="int64")
+    need = min(k, len(ids))
+    if need == 0:
+        return distances, labels
+
+    sel = faiss.IDSelectorBatch(ids)
+    distances, labels = index.search(queries, k, params=_search_parameters(index, sel))
+
+    short = np.flatnonzero((labels >= 0).sum(axis=1) < need)
+    if len(short):
+        vectors = reconstruct_ids(index, ids)
+        for q in short:
+            d = ((vectors - queries[q]) ** 2).sum(axis=1)
+            top = np.argpartition(d, need - 1)[:need] if need < len(d) else np.arange(len(d))
+            top = top[np.argsort(d[top], kind="stable")]
+            distances[q], labels[q] = np.inf, -1
+            distances[q, :need], labels[q, :need] = d[top], ids[top]
+    return distances, labels
+
+
+def save_index_config(index_dir: str, index_type: str, params: dict, **extra):
+    config = {"index_type": index_type, "params": params, **extra}
+    with open(os.path.join(index_dir, CONFIG_FILE), "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def load_index_config(index_dir: str) -> dict:
+    """
+    Index type + parameters recorded by build_index.py (indexes built before
+    this file existed are plain flat indexes).
+    """
+    path = os.path.join(index_dir, CONFIG_FILE)
+    if not os.path.exists(path):
+        return {"index_type": "flat", "params": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+# IO_FLAG_MMAP maps IVF inverted lists; IO_FLAG_MMAP_IFC (newer faiss) also maps flat codes
+MMAP_FLAGS = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+
+
+def read_index(index_dir: str, mmap: bool = False) -> faiss.Index:
+    """
+    Read docs.index and apply the stored search parameters.
+
+    mmap=True maps the vectors read-only instead of copying them to the heap,
+    so processes serving the same file share one copy in the page cache.
+    Index types / faiss builds that cannot be mapped are read normally.
+    """
+    path = os.path.join(index_dir, "docs.index")
+    index = None
+    if mmap:
+        try:
+            index = faiss.read_index(path, MMAP_FLAGS)
+        except RuntimeError as e:
+            print(f"mmap read of {path} not supported ({e}); reading into memory")
+    if index is None:
+        index = faiss.read_index(path)
+    apply_search_params(index, load_index_config(index_dir).get("params", {}))
+    return index
@@ -0,0 +1,154 @@
+import json
+import os
+import re
+from array import array
+from collections import Counter
+
+import numpy as np
+
+# BM25 inverted index over chunk text, stored next to docs.index.
+# Postings are grouped by term: rows/tfs of term t are POSTINGS[OFFSETS[t]:OFFSETS[t + 1]],
+# where a row is the chunk's position in the metadata store (ids via MetaStore.ids).
+VOCAB_FILE = "lex_vocab.json"
+OFFSETS_FILE = "lex_offsets.npy"
+POSTINGS_FILE = "lex_postings.npy"
+TF_FILE = "lex_tf.npy"
+DOCLEN_FILE = "lex_doclen.npy"
+STATS_FILE = "lex_stats.json"
+
+LEXICAL_FILES = (VOCAB_FILE, OFFSETS_FILE, POSTINGS_FILE, TF_FILE, DOCLEN_FILE, STATS_FILE)
+
+K1 = 1.2
+B = 0.75
+
+# policy codes (RET10), numbers and words; case-insensitive
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def lexical_exists(index_dir: str) -> bool:
+    return all(os.path.exists(os.path.join(index_dir, f)) for f in LEXICAL_FILES)
+
+
+def build_lexical_index(index_dir: str, meta, k1: float = K1, b: float = B) -> int:
+    """
+    Build the BM25 index into index_dir from a (committed) MetaStore.
+    Returns the vocabulary size.
+    """
+    vocab: dict[str, int] = {}
+    term_ids, rows, tfs = array("i"), array("i"), array("i")
+    doclen = np.zeros(len(meta), dtype=np.int32)
+
+    for row, chunk in enumerate(meta.values()):
+        tokens = tokenize(chunk["text"])
+        doclen[row] = len(tokens)
+        for term, tf in Counter(tokens).items():
+            term_ids.append(vocab.setdefault(term, len(vocab)))
+            rows.append(row)
+            tfs.append(tf)
+
+    term_ids = np.frombuffer(term_ids, dtype=np.int32)
+    # stable: rows stay ascending within each term
+    order = np.argsort(term_ids, kind="stable")
+    offsets = np.zeros(len(vocab) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(term_ids, minlength=len(vocab)), out=offsets[1:])
+
+    columns = {
+        OFFSETS_FILE: offsets,
+        POSTINGS_FILE: np.frombuffer(rows, dtype=np.int32)[order],
+        TF_FILE: np.minimum(np.frombuffer(tfs, dtype=np.int32)[order], np.iinfo(np.uint16).max).astype(np.uint16),
+        DOCLEN_FILE: doclen,
+    }
+    tmp = lambda name: os.path.join(index_dir, name + ".tmp")
+    for name, values in columns.items():
+        with open(tmp(name), "wb") as f:
+            np.save(f, values)
+    with open(tmp(VOCAB_FILE), "w") as f:
+        json.dump(list(vocab), f)
+    with open(tmp(STATS_FILE), "w") as f:
+        json.dump({"n_docs": len(meta), "avgdl": float(doclen.mean()) if len(meta) else 0.0, "k1": k1, "b": b}, f)
+
+    for name in LEXICAL_FILES:
+        os.replace(tmp(name), os.path.join(index_dir, name))
+    return len(vocab)
+
+
+class LexicalIndex:
+    """
+    Read-only BM25 index. Postings are memory-mapped; a query touches only the
+    postings of its own terms, so exact tokens like policy codes are cheap to find.
+    """
+
+    def __init__(self, index_dir: str, meta):
+        # the MetaStore of the same index dir: maps postings rows to chunk ids
+        self.meta = meta
+        with open(os.path.join(index_dir, VOCAB_FILE)) as f:
+            self.vocab = {term: i for i, term in enumerate(json.load(f))}
+        with open(os.path.join(index_dir, STATS_FILE)) as f:
+            stats = json.load(f)
+        self.n_docs, self.avgdl = stats["n_docs"], stats["avgdl"]
+        self.k1, self.b = stats["k1"], stats["b"]
+
+        load = lambda name: np.load(os.path.join(index_dir, name), mmap_mode="r")
+        self.offsets = load(OFFSETS_FILE)
+        self.postings = load(POSTINGS_FILE)
+        self.tf = load(TF_FILE)
+        # BM25 length normalisation per row, precomputed once
+        self._norm = (self.k1 * (1 - self.b + self.b * load(DOCLEN_FILE) / max(self.avgdl, 1e-9))).astype(np.float32)
+
+    def _term_scores(self, query: str):
+        for term in set(tokenize(query)):
+            t = self.vocab.get(term)
+            if t is None:
+                continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            rows = np.asarray(self.postings[start:end])
+            tf = np.asarray(self.tf[start:end], dtype=np.float32)
+            df = end - start
+            idf = np.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            yield rows, idf * tf * (self.k1 + 1) / (tf + self._norm[rows])
+
+    def search(self, query: str, k: int, allowed_rows: np.ndarray | None = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k chunks by BM25. Returns (chunk ids, scores), best first; only
+        chunks sharing at least one term with the query are returned.
+        allowed_rows (sorted metadata rows, see MetaStore.filter_rows) restricts the candidates.
+        """
+        parts = list(self._term_scores(query))
+        empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if not parts:
+            return empty
+        rows = np.concatenate([r for r, _ in parts])
+        scores = np.concatenate([s for _, s in parts])
+        if allowed_rows is not None:
+            pos = np.minimum(np.searchsorted(allowed_rows, rows), max(len(allowed_rows) - 1, 0))
+            keep = allowed_rows[pos] == rows if len(allowed_rows) else np.zeros(len(rows), dtype=bool)
+            rows, scores = rows[keep], scores[keep]
+            if not len(rows):
+                return empty
+        rows, inverse = np.unique(rows, return_inverse=True)
+        totals = np.bincount(inverse, weights=scores)
+        if len(rows) > k:
+            top = np.argpartition(-totals, k)[:k]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-totals[top], kind="stable")]
+        return np.asarray(self.meta.ids[rows[top]], dtype=np.int64), totals[top].astype(np.float32)
+
+
+def rrf_fuse(rankings: list, limit: int, k: int = 60) -> list[tuple[int, float]]:
+    """
+    Reciprocal rank fusion: each ranking (best first) adds 1 / (k + rank) to
+    its ids. Returns the top `limit` (id, fused score) pairs, best first.
+    """
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, chunk_id in enumerate(ranking, 1):
+            chunk_id = int(chunk_id)
+            if chunk_id < 0:
+                continue
+            fused[chunk_id] = fused.get(chunk_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:limit]
@@ -0,0 +1,184 @@
+import json
+import mmap
+import os
+from array import array
+
+import numpy as np
+
+# columnar chunk metadata, one row per FAISS id (rows sorted by id)
+IDS_FILE = "meta_ids.npy"
+OFFSETS_FILE = "meta_offsets.npy"
+TEXT_FILE = "meta_text.bin"
+SOURCE_FILE = "meta_source.npy"
+PAGE_FILE = "meta_page.npy"
+SOURCES_FILE = "meta_sources.json"
+# last page of chunks spanning pages; optional, stores written before it have single-page chunks
+PAGE_END_FILE = "meta_page_end.npy"
+
+META_FILES = (IDS_FILE, OFFSETS_FILE, TEXT_FILE, SOURCE_FILE, PAGE_FILE, SOURCES_FILE)
+
+
+def store_exists(index_dir: str) -> bool:
+    return all(os.path.exists(os.path.join(index_dir, f)) for f in META_FILES)
+
+
+def page_label(chunk: dict) -> str:
+    # "page 3", or "pages 3-4" for a chunk spanning pages
+    page, page_end = chunk["page"], chunk.get("page_end") or chunk["page"]
+    return f"page {page}" if page_end == page else f"pages {page}-{page_end}"
+
+
+class MetaStoreWriter:
+    """
+    Streams chunk records to disk: texts go straight into one UTF-8 blob,
+    only the small integer columns are kept in memory until commit().
+    Records must be added in increasing id order.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self._text = open(self._tmp(TEXT_FILE), "wb")
+        self._ids = array("q")
+        self._offsets = array("q", [0])
+        self._source = array("i")
+        self._page = array("i")
+        self._page_end = array("i")
+        self._sources: dict[str, int] = {}
+
+    def _tmp(self, name: str) -> str:
+        return os.path.join(self.index_dir, name + ".tmp")
+
+    def add(self, chunk_id: int, chunk: dict):
+        if self._ids and chunk_id <= self._ids[-1]:
+            raise ValueError(f"Chunk ids must be increasing (got {chunk_id} after {self._ids[-1]})")
+        data = chunk["text"].encode("utf-8")
+        self._text.write(data)
+        self._ids.append(chunk_id)
+        self._offsets.append(self._offsets[-1] + len(data))
+        self._source.append(self._sources.setdefault(chunk["source"], len(self._sources)))
+        self._page.append(int(chunk["page"]))
+        self._page_end.append(int(chunk.get("page_end", chunk["page"])))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def commit(self):
+        """
+        Write the columns and move all files into place.
+        """
+        self._text.close()
+        columns = {
+            IDS_FILE: np.frombuffer(self._ids, dtype=np.int64),
+            OFFSETS_FILE: np.frombuffer(self._offsets, dtype=np.int64),
+            SOURCE_FILE: np.frombuffer(self._source, dtype=np.int32),
+            PAGE_FILE: np.frombuffer(self._page, dtype=np.int32),
+            PAGE_END_FILE: np.frombuffer(self._page_end, dtype=np.int32),
+        }
+        for name, values in columns.items():
+            with open(self._tmp(name), "wb") as f:
+                np.save(f, values)
+        with open(self._tmp(SOURCES_FILE), "w") as f:
+            json.dump(list(self._sources), f)
+
+        for name in (*META_FILES, PAGE_END_FILE):
+            os.replace(self._tmp(name), os.path.join(self.index_dir, name))
+
+
+class MetaStore:
+    """
+    Read-only, memory-mapped chunk metadata with random access by FAISS id.
+
+    Nothing is deserialized at load time: columns and the text blob are
+    mmapped, so the pages live in the OS page cache and are shared by every
+    process (e.g. uvicorn workers) reading the same index.
+    """
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        self.ids = np.load(os.path.join(index_dir, IDS_FILE), mmap_mode="r")
+        self.offsets = np.load(os.path.join(index_dir, OFFSETS_FILE), mmap_mode="r")
+        self.source_idx = np.load(os.path.join(index_dir, SOURCE_FILE), mmap_mode="r")
+        self.page = np.load(os.path.join(index_dir, PAGE_FILE), mmap_mode="r")
+        page_end_path = os.path.join(index_dir, PAGE_END_FILE)
+        self.page_end = np.load(page_end_path, mmap_mode="r") if os.path.exists(page_end_path) else self.page
+        with open(os.path.join(index_dir, SOURCES_FILE)) as f:
+            self.sources = json.load(f)
+
+        text_path = os.path.join(index_dir, TEXT_FILE)
+        if os.path.getsize(text_path) > 0:
+            with open(text_path, "rb") as f:
+                self._text = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._text = b""
+
+        n = len(self.ids)
+        # full builds assign 0..n-1, so the row is the id itself
+        self._dense = n == 0 or (self.ids[0] == 0 and self.ids[-1] == n - 1)
+        self._source_code = {name: i for i, name in enumerate(self.sources)}
+        self._filters: dict[tuple, np.ndarray] = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def row(self, chunk_id: int) -> int:
+        n = len(self.ids)
+        if self._dense:
+            if 0 <= chunk_id < n:
+                return chunk_id
+        else:
+            pos = int(np.searchsorted(self.ids, chunk_id))
+            if pos < n and self.ids[pos] == chunk_id:
+                return pos
+        raise KeyError(chunk_id)
+
+    def record(self, row: int) -> dict:
+        start, end = self.offsets[row], self.offsets[row + 1]
+        return {
+            "text": self._text[start:end].decode("utf-8"),
+            "source": self.sources[self.source_idx[row]],
+            "page": int(self.page[row]),
+            "page_end": int(self.page_end[row]),
+        }
+
+    def __getitem__(self, chunk_id) -> dict:
+        return self.record(self.row(int(chunk_id)))
+
+    def __contains__(self, chunk_id) -> bool:
+        try:
+            self.row(int(chunk_id))
+            return True
+        except KeyError:
+            return False
+
+    def filter_rows(self, sources=None, pages=None) -> np.ndarray:
+        """
+        Sorted rows whose source is in sources and whose page range overlaps
+        pages (None = any).
+        Cached per filter, since the same few filters (e.g. one policy PDF) repeat.
+        """
+        key = (tuple(sorted(sources)) if sources is not None else None,
+               tuple(sorted(pages)) if pages is not None else None)
+        rows = self._filters.get(key)
+        if rows is None:
+            mask = np.ones(len(self.ids), dtype=bool)
+            if key[0] is not None:
+                codes = [self._source_code[s] for s in key[0] if s in self._source_code]
+                mask &= np.isin(self.source_idx, codes)
+            if key[1] is not None:
+                # first requested page >= the chunk's first page must be <= its last page
+                wanted = np.asarray(key[1] or (-1,))
+                pos = np.searchsorted(wanted, self.page)
+                mask &= (pos < len(wanted)) & (wanted[np.minimum(pos, len(wanted) - 1)] <= self.page_end)
+            rows = np.flatnonzero(mask)
+            if len(self._filters) >= 256:
+                self._filters.clear()
+            self._filters[key] = rows
+        return rows
+
+    def items(self):
+        for row in range(len(self.ids)):
+            yield int(self.ids[row]), self.record(row)
+
+    def values(self):
+        for row in range(len(self.ids)):
+            yield self.record(row)
@@ -1,35 +1,52 @@
 import joblib
 import pandas as pd
-import pickle
-import faiss
-from sentence_transformers import SentenceTransformer
+
+from action_parser import format_actions
+from embedders import load_embedder
+from index_factory import read_index
+from lexical import LexicalIndex, lexical_exists, rrf_fuse
+from meta_store import MetaStore, page_label
 
 MODEL_PATH = "models/churn_model.joblib"
 INDEX_DIR = "rag/index"
 EMBED_MODEL = "all-MiniLM-L6-v2"
+HYBRID_CANDIDATES = 20
 
 
 def load_rag():
-    index = faiss.read_index(f"{INDEX_DIR}/docs.index")
-    with open(f"{INDEX_DIR}/docs_meta.pkl", "rb") as f:
-        meta = pickle.load(f)
-    embedder = SentenceTransformer(EMBED_MODEL)
-    return index, meta, embedder
+    index = read_index(INDEX_DIR)
+    meta = MetaStore(INDEX_DIR)
+    lexical = LexicalIndex(INDEX_DIR, meta) if lexical_exists(INDEX_DIR) else None
+    embedder = load_embedder(EMBED_MODEL)
+    return index, meta, lexical, embedder
 
 
 def rag_search(query: str, top_k: int = 5):
-    index, meta, embedder = load_rag()
+    """
+    Hybrid retrieval: FAISS and BM25 rankings fused with reciprocal rank fusion
+    (dense only if the index has no lexical files).
+    """
+    index, meta, lexical, embedder = load_rag()
     q_emb = embedder.encode([query], convert_to_numpy=True).astype("float32")
-    distances, ids = index.search(q_emb, top_k)
+    k = max(top_k, HYBRID_CANDIDATES) if lexical is not None else top_k
+    distances, ids = index.search(q_emb, k)
+    dist = {int(idx): float(d) for idx, d in zip(ids[0], distances[0]) if idx >= 0}
+
+    if lexical is not None:
+        lex_ids, _ = lexical.search(query, k)
+        ranked = [idx for idx, _ in rrf_fuse([ids[0], lex_ids], top_k)]
+    else:
+        ranked = [int(idx) for idx in ids[0] if idx >= 0]
 
     results = []
-    for idx, dist in zip(ids[0], distances[0]):
+    for idx in ranked:
         chunk = meta[idx]
         results.append({
             "text": chunk["text"],
             "source": chunk["source"],
             "page": chunk["page"],
-            "distance": float(dist),
+            "page_end": chunk["page_end"],
+            "distance": dist.get(idx),
         })
     return results
 
@@ -53,60 +70,14 @@ def predict_churn(customer: dict):
 def pick_action_chunk(results: list[dict]) -> dict | None:
     """
     From retrieved chunks, pick the one that most likely contains retention actions.
+    rag_search is hybrid, so chunks containing the action terms of the query
+    (RET10, escalation, ...) are already ranked first by the BM25 side.
     """
     if not results:
         return None
-
-    keywords = [
-        "Recommended actions",
-        "RET10",
-        "RET5",
-        "Plan Upgrade",
-        "Premium Support",
-        "Contract Lock-in",
-        "Escalation",
-        "within 24 hours",
-        "within 12 hours",
-        "discount",
-    ]
-
-    # Prefer chunks that contain action keywords
-    for r in results:
-        t = r["text"].lower()
-        if any(k.lower() in t for k in keywords):
-            return r
-
-    # fallback: first result
     return results[0]
 
 
-def format_actions(text: str, limit: int = 1600) -> str:
-    """
-    Converts raw policy chunk into readable bullet/action list.
-    """
-    if not text:
-        return ""
-
-    # Normalize whitespace
-    text = " ".join(text.split())
-
-    # Focus on section after "Recommended actions" if present
-    marker = "Recommended actions:"
-    if marker.lower() in text.lower():
-        # case-insensitive split
-        idx = text.lower().find(marker.lower())
-        text = text[idx + len(marker):].strip()
-
-    # Put newlines before numbered items
-    for m in ["1.", "2.", "3.", "4.", "5.", "6."]:
-        text = text.replace(m, f"\n{m}")
-
-    # Add a newline before common bullets too (some PDFs extract like ○)
-    text = text.replace("○", "\n  -")
-
-    return text[:limit]
-
-
 def main():
     print("=== Domain Intelligence System (ML + RAG) ===")
 
@@ -175,7 +146,7 @@ def main():
 
     print("\n--- RAG Evidence (Top chunks) ---")
     for r in results[:3]:
-        print(f"- {r['source']} (page {r['page']})")
+        print(f"- {r['source']} ({page_label(r)})")
 
     action_chunk = pick_action_chunk(results)
 
@@ -187,10 +158,10 @@ def main():
     # Show unique citations only
     seen = set()
     for r in results[:5]:
-        key = (r["source"], r["page"])
+        key = (r["source"], r["page"], r["page_end"])
         if key not in seen:
             seen.add(key)
-            print(f"- {r['source']} (page {r['page']})")
+            print(f"- {r['source']} ({page_label(r)})")
 
 
 if __name__ == "__main__":